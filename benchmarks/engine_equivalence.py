@@ -0,0 +1,67 @@
+"""
+Checks that the fast back test engines come up with the same instances as the PlayOrchestrator
+state machine, and how much faster they are. Runs the play library in the mfers-tabot bucket over
+
+    synthetic   - a seeded random walk for every symbol in the library
+    recorded    - <directory>/<symbol>.csv for every symbol, if a directory is given
+
+and prints, per engine, how many instances match, the speedup, and the first bar where they
+diverge if they do. Exits non-zero if any engine diverges.
+
+python -m benchmarks.engine_equivalence [directory of recorded OHLC] [synthetic bars]
+"""
+import functools
+import os
+import sys
+import zlib
+
+from parameter_store import S3
+
+from core import PlayLibrary, StrategyHandler, configure_logging, SINK_NULL
+from core.engine_check import EquivalenceCheck
+from core.frame_symbol import read_bars, synthetic_bars
+from strategies import *
+
+store_factory = functools.partial(S3, "mfers-tabot")
+strategy_handler = StrategyHandler(globals().copy())
+
+ENGINES = {"macd_fast": MacdFastBacktest}
+
+
+def library_symbols() -> set[str]:
+    return PlayLibrary(store=store_factory(), strategy_handler=strategy_handler).unique_symbols
+
+
+def synthetic_case(symbols: set[str], periods: int) -> dict:
+    # seeded by symbol name so every run gets the same bars
+    return {s: synthetic_bars(periods, seed=zlib.crc32(s.encode())) for s in symbols}
+
+
+def recorded_case(symbols: set[str], directory: str) -> dict:
+    return {s: read_bars(os.path.join(directory, f"{s}.csv")) for s in symbols}
+
+
+if __name__ == "__main__":
+    configure_logging(quiet=True, sink=SINK_NULL)
+    directory = sys.argv[1] if len(sys.argv) > 1 else None
+    periods = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+    symbols = library_symbols()
+    cases = {"synthetic": synthetic_case(symbols, periods)}
+    if directory:
+        cases["recorded"] = recorded_case(symbols, directory)
+
+    check = EquivalenceCheck(
+        store_factory=store_factory, strategy_handler=strategy_handler, engines=ENGINES
+    )
+
+    equivalent = True
+    for case, frames in cases.items():
+        report = check.run(frames, case=case)
+        print(report)
+        for engine in report.engines.values():
+            for d in sorted(engine.divergences, key=lambda d: d.bar)[:10]:
+                print(f"        {d}")
+        equivalent &= report.equivalent
+
+    sys.exit(0 if equivalent else 1)
@@ -0,0 +1,67 @@
+"""
+Memory held per live Instance (with its waiting State) and the time taken to create them. Run it
+on two revisions to compare eg. before and after a change to Instance or State:
+
+python -m benchmarks.instance_memory_bench [count]
+"""
+import sys
+import time
+import tracemalloc
+
+from core import Instance, State, StateWaiting
+
+
+class BenchStateWaiting(StateWaiting):
+    __slots__ = ()
+
+    def __init__(self, previous_state: State = None, parent_instance=None) -> None:
+        super().__init__(parent_instance=parent_instance, previous_state=previous_state)
+
+    def check_exit(self):
+        return State.STATE_STAY, None, {}
+
+
+class BenchConfig:
+    name = "bench"
+    state_waiting = BenchStateWaiting
+
+
+class BenchSymbol:
+    yf_symbol = "BENCH-USD"
+    ohlc = None
+
+
+class BenchController:
+    # just enough of a SymbolPlay for an Instance to hang off
+    play_config = BenchConfig()
+    symbol = BenchSymbol()
+    time_manager = None
+    broker = None
+    bar_window = None
+    telemetry = None
+    run_id = "bench"
+
+
+def bench(count: int):
+    controller = BenchController()
+    config = controller.play_config
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    started = time.perf_counter()
+    instances = [Instance(template=config, play_controller=controller) for _ in range(count)]
+    elapsed = time.perf_counter() - started
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # reprs force the ids to be built, which is what happens once an instance gets logged
+    ids = [repr(i) for i in instances]
+
+    print(f"instances       {count}")
+    print(f"bytes/instance  {(after - before) / count:.0f}")
+    print(f"us/instance     {elapsed / count * 1e6:.2f}")
+    return instances, ids
+
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,75 @@
+"""
+Per-tick cost of instance logging. Runs the log calls a taking profit instance makes each tick
+(check_exit trace, state transition trace, "still open" with an order dict) against a logger set
+to level 51, like instance_log is, and reports the cost per tick for:
+
+    eager   - messages and extras built up front, the way callers used to do it
+    lazy    - messages as lambdas, order.as_dict passed uncalled
+    quiet   - lazy, with ShonkyLog.set_quiet() as back tests do
+
+python -m benchmarks.shonky_log_bench
+"""
+import logging
+import timeit
+
+from core.shonky_log import ShonkyLog
+
+
+class FakeOrder:
+    def __init__(self):
+        self.order_id = "abc123"
+        self.status_summary = "open"
+        self.ordered_unit_price = 101.25
+
+    def as_dict(self):
+        return {
+            "order_id": self.order_id,
+            "status_summary": self.status_summary,
+            "ordered_unit_price": self.ordered_unit_price,
+            "filled_units": 0,
+            "ordered_units": 10,
+        }
+
+
+logger = logging.getLogger("shonky_log_bench")
+logger.setLevel(51)
+slog = ShonkyLog(logger)
+order = FakeOrder()
+state = "MacdStateTakingProfit"
+extras = {"held_units": 10, "next_state": None, "last_close": 100.5}
+
+
+def eager_tick():
+    slog.log(9, f"Started check_exit on {state}")
+    slog.log(9, f"STATE_MOVE from {state} to {state}")
+    slog.info(
+        f"Order ID {order.order_id} is still in state {order.status_summary}. Last close "
+        f"{extras['last_close']} vs entry price {order.ordered_unit_price}"
+    )
+    slog.log(9, "Take profit order still open", state_parameters=extras, order=order.as_dict())
+
+
+def lazy_tick():
+    slog.log(9, lambda: f"Started check_exit on {state}")
+    slog.log(9, lambda: f"STATE_MOVE from {state} to {state}")
+    slog.info(
+        lambda: f"Order ID {order.order_id} is still in state {order.status_summary}. Last close "
+        f"{extras['last_close']} vs entry price {order.ordered_unit_price}"
+    )
+    slog.log(9, "Take profit order still open", state_parameters=extras, order=order.as_dict)
+
+
+def bench(label: str, fn, number: int = 200000):
+    seconds = min(timeit.repeat(fn, number=number, repeat=5))
+    per_tick = seconds / number * 1e9
+    print(f"{label:8} {per_tick:8.0f} ns/tick")
+    return per_tick
+
+
+if __name__ == "__main__":
+    ShonkyLog.set_quiet(False)
+    eager = bench("eager", eager_tick)
+    lazy = bench("lazy", lazy_tick)
+    ShonkyLog.set_quiet(True)
+    quiet = bench("quiet", lazy_tick)
+    print(f"saving   {eager - quiet:8.0f} ns/tick ({eager / quiet:.1f}x)")
@@ -0,0 +1,111 @@
+"""
+Checks SqsBatched against InMemorySqs, no AWS needed:
+
+    batching        - 25 events and a flush() go out as batches of 10, 10 and 5, in order
+    max latency     - events are sent once the oldest has waited max_latency, without a flush()
+    backpressure    - emit() blocks while max_queue events are waiting on a stuck sender
+    close           - close() sends whatever is still queued
+
+Prints each check and exits non-zero if any of them fail.
+
+python -m benchmarks.telemetry_check
+"""
+import json
+import sys
+import threading
+import time
+
+from core.constants import RT_BACKTEST
+from core.telemetry import SqsBatched, InMemorySqs
+
+
+class QueueStore:
+    # only the queue url is read from the store
+    def get(self, path: str) -> str:
+        return "https://sqs.local/telemetry"
+
+
+class GatedSqs(InMemorySqs):
+    # holds every send_message_batch call until the gate is opened
+    def __init__(self):
+        super().__init__()
+        self.gate = threading.Event()
+
+    def send_message_batch(self, QueueUrl: str, Entries: list[dict]):
+        self.gate.wait()
+        return super().send_message_batch(QueueUrl=QueueUrl, Entries=Entries)
+
+
+def telemetry(client: InMemorySqs, **kwargs) -> SqsBatched:
+    return SqsBatched(store=QueueStore(), run_type=RT_BACKTEST, sqs_client=client, **kwargs)
+
+
+def sent(client: InMemorySqs) -> list[int]:
+    return [json.loads(m["Body"])["n"] for m in client.messages]
+
+
+def check_batching() -> bool:
+    client = InMemorySqs()
+    t = telemetry(client, max_latency=60)
+    for n in range(25):
+        t.emit("check", n=n)
+    t.flush()
+    ok = client.batch_count == 3 and sent(client) == list(range(25))
+    t.close()
+    print(f"batching: {client.batch_count} batches, {len(client.messages)} messages")
+    return ok
+
+
+def check_max_latency() -> bool:
+    client = InMemorySqs()
+    t = telemetry(client, max_latency=0.05)
+    for n in range(3):
+        t.emit("check", n=n)
+    time.sleep(0.5)
+    ok = client.batch_count == 1 and sent(client) == [0, 1, 2]
+    print(f"max latency: {len(client.messages)} messages sent without a flush")
+    t.close()
+    return ok
+
+
+def check_backpressure() -> bool:
+    client = GatedSqs()
+    t = telemetry(client, max_latency=60, max_queue=10)
+    emitted = []
+
+    def emit_all():
+        for n in range(25):
+            t.emit("check", n=n)
+            emitted.append(n)
+
+    emitter = threading.Thread(target=emit_all, daemon=True)
+    emitter.start()
+    time.sleep(0.5)
+    # the sender is stuck on the first batch of 10, and another 10 fill the queue
+    blocked = emitter.is_alive() and len(emitted) == 20
+
+    client.gate.set()
+    emitter.join(timeout=5)
+    t.close()
+    ok = blocked and not emitter.is_alive() and sent(client) == list(range(25))
+    print(f"backpressure: emit() blocked after {20 if blocked else len(emitted)} events")
+    return ok
+
+
+def check_close() -> bool:
+    client = InMemorySqs()
+    t = telemetry(client, max_latency=60)
+    for n in range(7):
+        t.emit("check", n=n)
+    t.close()
+    ok = sent(client) == list(range(7))
+    print(f"close: {len(client.messages)} messages sent")
+    return ok
+
+
+if __name__ == "__main__":
+    checks = [check_batching, check_max_latency, check_backpressure, check_close]
+    failed = [c.__name__ for c in checks if not c()]
+    if failed:
+        print(f"FAILED: {', '.join(failed)}")
+    sys.exit(1 if failed else 0)
@@ -6,17 +6,33 @@ from .state_stopping_loss import StateStoppingLoss
 from .state_taking_profit import StateTakingProfit
 from .state_terminated import StateTerminated
 from .instance_list import InstanceList
+from .instance_summary import InstanceSummary
+from .config_totals import ConfigTotals
+from .order_ledger import OrderLedger
+from .order_cache import OrderCache, BackTestBulkAPI
+from .trigger_index import TriggerIndex
+from .entry_signal_board import EntrySignalBoard
 from .instance import Instance
 from .controller_config import ControllerConfig
 from .strategy_handler import StrategyHandler
-from .symbol_data import SymbolData
+from .symbol_data import SymbolData, SignalCache
 from .symbol_handler import SymbolHandler
 from .symbol_play import SymbolPlay
 from .play_library import PlayLibrary
-from .play_orchestrator import PlayOrchestrator
+from .play_orchestrator import PlayOrchestrator, PlayStretch
+from .log_sinks import configure_logging, configure_sink, register_sink, SINK_NULL, SINK_FILE, SINK_CLOUDWATCH
+from .parallel_backtest import ParallelBacktest, SHARD_CATEGORY, SHARD_SYMBOL
+from .sweep import ParameterSweep, SweepLibrary, expand_grid
+from .frame_symbol import FrameSymbol, synthetic_bars, read_bars
+from .exit_simulator import ExitSimulator
+from .engine_check import EquivalenceCheck, EquivalenceReport
 from .play_config import PlayConfig
 from .weather import IWeatherReader, StubWeather
-from .ita import ITA
+from .market_regime_weather import MarketRegimeWeather, RegimeChange
+from .ita import ITA, ITAStream
+from .ta_stream import EmaStream, SmaStream
+from .ta_pipeline import TAPipeline
+from .ta_cache import TACache
 from .constants import RT_BACKTEST, RT_PAPER, RT_REAL, RT_DICT
 
 from .exceptions import *
@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+
+import logging
+
+log = logging.getLogger(__name__)
+
+
+class BarWindow:
+    """
+    Fixed-capacity ring buffer of the most recent bars for one symbol, one float64 column per OHLC
+    and TA column (booleans stored as 1.0/0.0, non-numeric columns skipped).
+
+    Each value is written twice, capacity slots apart, so that any lookback of up to capacity bars
+    is a contiguous slice - get() hands back a read-only view rather than a copy, and the scalar
+    accessors read straight out of the array. States use this to get at the latest Close without
+    building pandas objects every tick
+    """
+
+    columns: list[str]
+    capacity: int
+    last_timestamp: pd.Timestamp
+
+    def __init__(self, columns: list[str], capacity: int = 512) -> None:
+        self.columns = list(columns)
+        self.capacity = capacity
+        self._column_positions = {c: n for n, c in enumerate(self.columns)}
+        self._data = np.full((len(self.columns), capacity * 2), np.nan)
+        self._latest = -1
+        self._count = 0
+        self.last_timestamp = None
+
+        # when syncing from a bars frame
+        self._source = None
+        self._source_index = None
+        self._synced = -1
+
+    @classmethod
+    def from_bars(cls, bars: pd.DataFrame, capacity: int = 512) -> "BarWindow":
+        columns = [
+            c
+            for c in bars.columns
+            if pd.api.types.is_numeric_dtype(bars[c]) or pd.api.types.is_bool_dtype(bars[c])
+        ]
+        return cls(columns=columns, capacity=capacity)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, values, timestamp: pd.Timestamp = None) -> None:
+        # values is a row in column order
+        slot = (self._latest + 1) % self.capacity
+        self._data[:, slot] = values
+        self._data[:, slot + self.capacity] = values
+        self._latest = slot
+        self._count = min(self._count + 1, self.capacity)
+        self.last_timestamp = timestamp
+
+    def sync(self, bars: pd.DataFrame, now: pd.Timestamp) -> None:
+        # bring the window up to date with bars, up to and including the last bar at or before now
+        if self._source_index is not bars.index:
+            # first sync, or the symbol's bars have been refreshed
+            self._source = bars[self.columns].to_numpy(dtype=np.float64).T
+            self._source_index = bars.index
+            self._synced = -1
+            self._latest = -1
+            self._count = 0
+
+        try:
+            position = self._source_index.get_loc(now)
+        except KeyError:
+            position = self._source_index.searchsorted(now, side="right") - 1
+
+        start = max(self._synced + 1, position - self.capacity + 1, 0)
+        for p in range(start, position + 1):
+            self.append(self._source[:, p], self._source_index[p])
+
+        self._synced = max(self._synced, position)
+
+    def get(self, column: str, lookback: int = None) -> np.ndarray:
+        # oldest to newest, newest last. lookback defaults to everything held
+        if lookback is None:
+            lookback = self._count
+        if lookback > self._count:
+            raise IndexError(
+                f"Asked for {lookback} bars of {column} but only {self._count} are held"
+            )
+
+        end = self._latest + self.capacity + 1
+        view = self._data[self._column_positions[column], end - lookback : end]
+        view.flags.writeable = False
+        return view
+
+    def latest(self, column: str) -> float:
+        if self._count == 0:
+            raise IndexError("No bars in window yet")
+        return self._data[self._column_positions[column], self._latest]
+
+    @property
+    def close(self) -> float:
+        return self.latest("Close")
@@ -1,9 +1,14 @@
 from symbol import Symbol
+from typing import Callable
 from broker_api import ITradeAPI
 from .play_config import PlayConfig
 from .symbol_handler import SymbolHandler
+from .symbol_play import SymbolPlay
 from .time_manager import BackTestTimeManager
 from .telemetry import ITelemetry
+from .bar_window import BarWindow
+from .entry_signal_board import EntrySignalBoard
+from .config_totals import ConfigTotals
 
 import logging
 
@@ -24,6 +29,11 @@ class CategoryHandler:
     time_manager: BackTestTimeManager
     play_id: str
     telemetry: ITelemetry
+    bar_windows: dict[str, BarWindow]
+    signal_caches: dict[str, dict]
+    entry_signals: EntrySignalBoard
+    config_totals: dict[PlayConfig, ConfigTotals]
+    on_active_changed: Callable[[SymbolPlay], None]
 
     def __init__(
         self,
@@ -33,6 +43,9 @@ class CategoryHandler:
         time_manager: BackTestTimeManager,
         run_id: str,
         telemetry: ITelemetry,
+        bar_windows: dict[str, BarWindow],
+        signal_caches: dict[str, dict] = None,
+        on_active_changed: Callable[[SymbolPlay], None] = None,
     ):
         self.symbols = symbols
         self.play_configs = play_configs
@@ -41,6 +54,13 @@ class CategoryHandler:
         self.time_manager = time_manager
         self.run_id = run_id
         self.telemetry = telemetry
+        self.bar_windows = bar_windows
+        self.signal_caches = signal_caches
+        # configs that enter the same way share their waiting state results
+        self.entry_signals = EntrySignalBoard(time_manager)
+        # every symbol play adds its terminated instances to these
+        self.config_totals = dict()
+        self.on_active_changed = on_active_changed
 
         for config in play_configs:
             self.symbol_handlers.append(
@@ -51,6 +71,11 @@ class CategoryHandler:
                     time_manager=time_manager,
                     run_id=run_id,
                     telemetry=telemetry,
+                    bar_windows=bar_windows,
+                    signal_caches=signal_caches,
+                    entry_signals=self.entry_signals,
+                    config_totals=self.config_totals,
+                    on_active_changed=on_active_changed,
                 )
             )
 
@@ -65,3 +90,19 @@ class CategoryHandler:
     def run(self) -> None:
         for h in self.symbol_handlers:
             h.run()
+
+    @property
+    def active_symbol_plays(self) -> list[SymbolPlay]:
+        # what run() goes through, in the same order
+        return [c for h in self.symbol_handlers for c in h.active_symbol_plays]
+
+    def get_instance_summaries(self) -> list[dict]:
+        summaries = []
+        for h in self.symbol_handlers:
+            summaries += h.get_instance_summaries()
+        return summaries
+
+    def get_config_totals(self) -> list[ConfigTotals]:
+        # one per play config, best total gain first
+        totals = [h.get_config_totals() for h in self.symbol_handlers]
+        return sorted(totals, key=lambda t: t.total_gain, reverse=True)
@@ -0,0 +1,53 @@
+from .play_config import PlayConfig
+from .instance_summary import InstanceSummary
+
+
+class ConfigTotals:
+    """
+    Running totals of the instances one play config has terminated, added to as each one
+    terminates so they never need rescanning. Shared across a category by CategoryHandler, so
+    ranking its play configs only looks at one of these per config. total_gain is sold - bought,
+    the same way round as the instance summaries
+    """
+
+    __slots__ = ("config", "instances", "bought_value", "sold_value", "winners")
+
+    config: PlayConfig
+    instances: int
+    bought_value: float
+    sold_value: float
+    winners: int
+
+    def __init__(self, config: PlayConfig) -> None:
+        self.config = config
+        self.instances = 0
+        self.bought_value = 0
+        self.sold_value = 0
+        self.winners = 0
+
+    def add(self, summary: InstanceSummary) -> None:
+        self.instances += 1
+        self.bought_value += summary.bought_value
+        self.sold_value += summary.sold_value
+        if summary.sold_value > summary.bought_value:
+            self.winners += 1
+
+    def merge(self, other: "ConfigTotals") -> None:
+        self.instances += other.instances
+        self.bought_value += other.bought_value
+        self.sold_value += other.sold_value
+        self.winners += other.winners
+
+    @property
+    def total_gain(self) -> float:
+        return self.sold_value - self.bought_value
+
+    @property
+    def win_rate(self) -> float:
+        return self.winners / self.instances if self.instances else 0
+
+    def __repr__(self) -> str:
+        return (
+            f"ConfigTotals {self.config.name}: {self.instances} instances, "
+            f"gain {self.total_gain:,.2f}"
+        )
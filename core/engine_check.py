@@ -0,0 +1,353 @@
+from parameter_store import IParameterStore
+from symbol import Symbol
+from typing import Callable
+from time import perf_counter
+import math
+import pandas as pd
+
+from .play_config import PlayConfig
+from .play_orchestrator import PlayOrchestrator, PlayStretch
+from .strategy_handler import StrategyHandler
+from .frame_symbol import FrameSymbol
+from .telemetry import ITelemetry
+from .time_manager import ITimeManager
+from .weather import IWeatherReader
+from .constants import RT_BACKTEST
+
+import logging
+
+log = logging.getLogger(__name__)
+
+# summary fields that have to agree between engines - the rest are ids and labels
+COMPARED_FIELDS = (
+    "units",
+    "bought_value",
+    "sold_value",
+    "total_gain",
+    "average_buy_price",
+    "average_sell_price",
+    "sell_order_filled_count",
+)
+
+
+class _TerminationRecorder(ITelemetry):
+    # keeps instance summaries in memory, along with the bar each instance terminated on
+    time_manager: ITimeManager
+    terminated: list[dict]
+
+    def __init__(self) -> None:
+        self.time_manager = None
+        self.terminated = []
+
+    def emit(self, event: str, *args, **kwargs):
+        if event == "instance terminated":
+            self.terminated.append(dict(kwargs, exited=self.time_manager.now))
+
+
+class Divergence:
+    symbol: str
+    play_config_name: str
+    bar: pd.Timestamp
+    field: str
+    reference: object
+    candidate: object
+
+    def __init__(self, symbol, play_config_name, bar, field, reference, candidate) -> None:
+        self.symbol = symbol
+        self.play_config_name = play_config_name
+        self.bar = bar
+        self.field = field
+        self.reference = reference
+        self.candidate = candidate
+
+    def __repr__(self) -> str:
+        return (
+            f"Divergence {self.symbol} {self.play_config_name} at {self.bar}: {self.field} "
+            f"{self.reference} (reference) vs {self.candidate}"
+        )
+
+
+class EngineReport:
+    name: str
+    elapsed: float
+    speedup: float
+    instances: int
+    matched: int
+    divergences: list[Divergence]
+
+    def __init__(self, name: str, elapsed: float, reference_elapsed: float) -> None:
+        self.name = name
+        self.elapsed = elapsed
+        self.speedup = reference_elapsed / elapsed if elapsed else math.inf
+        self.instances = 0
+        self.matched = 0
+        self.divergences = []
+
+    @property
+    def equivalent(self) -> bool:
+        return not self.divergences
+
+    @property
+    def first_divergence(self) -> Divergence:
+        if not self.divergences:
+            return None
+        return min(self.divergences, key=lambda d: d.bar)
+
+    def __str__(self) -> str:
+        verdict = "equivalent" if self.equivalent else f"first diverges {self.first_divergence}"
+        return (
+            f"{self.name}: {self.matched}/{self.instances} instances match, "
+            f"{self.elapsed:.3f}s ({self.speedup:.1f}x), {verdict}"
+        )
+
+
+class EquivalenceReport:
+    case: str
+    reference_elapsed: float
+    reference_instances: int
+    stretches: int
+    stopped: int
+    engines: dict[str, EngineReport]
+
+    def __init__(
+        self,
+        case: str,
+        reference_elapsed: float,
+        reference_instances: int,
+        stretches: int,
+        stopped: int,
+    ) -> None:
+        self.case = case
+        self.reference_elapsed = reference_elapsed
+        self.reference_instances = reference_instances
+        self.stretches = stretches
+        # instances the state machine terminated because the weather changed, which aren't compared
+        self.stopped = stopped
+        self.engines = dict()
+
+    @property
+    def equivalent(self) -> bool:
+        return all(e.equivalent for e in self.engines.values())
+
+    def __str__(self) -> str:
+        lines = [
+            f"{self.case}: state machine {self.reference_instances} instances over "
+            f"{self.stretches} stretches ({self.stopped} stopped by the weather), "
+            f"{self.reference_elapsed:.3f}s"
+        ]
+        lines += [f"    {e}" for e in self.engines.values()]
+        return "\n".join(lines)
+
+
+class EquivalenceCheck:
+    """
+    Runs the same bars through the PlayOrchestrator state machine and through one or more faster
+    back test engines, and checks they come up with the same instances. Bars are handed in as
+    DataFrames (see synthetic_bars and read_bars) and served by FrameSymbols, and orders go through
+    the usual BackTestAPI, so every run of a case is repeatable. A match only holds for the
+    BackTestAPI it was run against - engines that model fills themselves, like MacdFastBacktest,
+    need checking again when the broker changes.
+
+    The state machine's run is split in to the PlayStretches it ran - a category on one market
+    condition, between changes in the weather. An engine is called as engine(symbol=,
+    play_config=, run_id=, start=, end=, signal_cache=) for each stretch, symbol and play config,
+    with the stretch's first and last ticks, signal_cache being a dict shared by the calls for the
+    same symbol. It has to return an object whose run() gives the instance summaries, and whose
+    trades attribute lists the bar each of those instances exited on eg. MacdFastBacktest. Engines
+    get the symbols after TA has been applied, and TA isn't counted in either side's time.
+
+    Summaries are paired up in exit order per stretch, symbol and play config. A pair diverges if
+    their exit bars differ, or if any of COMPARED_FIELDS differ by more than rel_tol/abs_tol.
+    Instances the state machine terminated because their stretch was stopped are counted in the
+    report but not compared - engines only model instances that trade their way out
+    """
+
+    store_factory: Callable[[], IParameterStore]
+    strategy_handler: StrategyHandler
+    engines: dict[str, Callable]
+    symbol_kwargs: dict
+    weather_factory: Callable[..., IWeatherReader]
+    rel_tol: float
+    abs_tol: float
+
+    def __init__(
+        self,
+        store_factory: Callable[[], IParameterStore],
+        strategy_handler: StrategyHandler,
+        engines: dict[str, Callable],
+        symbol_kwargs: dict = None,
+        weather_factory: Callable[..., IWeatherReader] = None,
+        rel_tol: float = 1e-9,
+        abs_tol: float = 1e-9,
+    ) -> None:
+        self.store_factory = store_factory
+        self.strategy_handler = strategy_handler
+        self.engines = engines
+        # eg. min_price_increment, passed to every FrameSymbol
+        self.symbol_kwargs = symbol_kwargs or dict()
+        # eg. MarketRegimeWeather, handed to the PlayOrchestrator
+        self.weather_factory = weather_factory
+        self.rel_tol = rel_tol
+        self.abs_tol = abs_tol
+
+    def run(self, frames: dict[str, pd.DataFrame], case: str = "case") -> EquivalenceReport:
+        def symbol_factory(symbol: str, time_manager: ITimeManager) -> Symbol:
+            if symbol not in frames:
+                raise KeyError(f"No bars given for {symbol} in {case}")
+            return FrameSymbol(symbol, frames[symbol], time_manager, **self.symbol_kwargs)
+
+        recorder = _TerminationRecorder()
+        po = PlayOrchestrator(
+            store=self.store_factory(),
+            strategy_handler=self.strategy_handler,
+            run_type=RT_BACKTEST,
+            telemetry=recorder,
+            symbol_factory=symbol_factory,
+            weather_factory=self.weather_factory,
+        )
+        recorder.time_manager = po.time_manager
+
+        started = perf_counter()
+        po.start()
+        while not po.eof:
+            po.run()
+        reference_elapsed = perf_counter() - started
+        po.shutdown()
+
+        stretches = po.stretches
+        reference, stopped = self._split(recorder.terminated, stretches)
+        report = EquivalenceReport(
+            case, reference_elapsed, len(recorder.terminated), len(stretches), stopped
+        )
+        plays = self._plays(po, stretches)
+
+        for name, engine in self.engines.items():
+            summaries = []
+            # each engine starts from nothing, rather than from the state machine's signals
+            signal_caches = dict()
+            started = perf_counter()
+            for n, symbol, play_config in plays:
+                run = engine(
+                    symbol=symbol,
+                    play_config=play_config,
+                    run_id=str(po),
+                    start=stretches[n].start,
+                    end=stretches[n].end,
+                    signal_cache=signal_caches.setdefault(symbol.yf_symbol, dict()),
+                )
+                these = run.run()
+                summaries += [
+                    dict(s, exited=t["exited"], stretch=n) for s, t in zip(these, run.trades)
+                ]
+            elapsed = perf_counter() - started
+
+            engine_report = EngineReport(name, elapsed, reference_elapsed)
+            self._compare(reference, self._group(summaries), engine_report)
+            report.engines[name] = engine_report
+            log.info(f"{case}: {engine_report}")
+
+        return report
+
+    @staticmethod
+    def _plays(
+        po: PlayOrchestrator, stretches: list[PlayStretch]
+    ) -> list[tuple[int, Symbol, PlayConfig]]:
+        # every stretch x symbol x play config the state machine ran
+        plays = []
+        for n, stretch in enumerate(stretches):
+            if stretch.start is None:
+                continue
+            symbols = po.get_category_symbols(stretch.category)
+            for play_config in po.get_plays(stretch.category, stretch.condition):
+                for symbol in symbols.values():
+                    plays.append((n, symbol, play_config))
+        return plays
+
+    def _split(
+        self, summaries: list[dict], stretches: list[PlayStretch]
+    ) -> tuple[dict[tuple, list[dict]], int]:
+        # the state machine's summaries by the stretch they were terminated in, leaving out the
+        # ones terminated by the stretch being stopped
+        by_stretch = []
+        stopped = 0
+        for s in summaries:
+            for n, stretch in enumerate(stretches):
+                if (
+                    stretch.category == s["symbol_group"]
+                    and stretch.condition == s["weather_condition"]
+                    and (stretch.start is None or stretch.start <= s["exited"])
+                    and (stretch.stopped is None or s["exited"] <= stretch.stopped)
+                ):
+                    break
+            else:
+                raise RuntimeError(f"Instance {s['instance_id']} didn't run in any stretch")
+
+            if s["exited"] == stretch.stopped:
+                stopped += 1
+            else:
+                by_stretch.append(dict(s, stretch=n))
+
+        return self._group(by_stretch), stopped
+
+    @staticmethod
+    def _group(summaries: list[dict]) -> dict[tuple, list[dict]]:
+        grouped = dict()
+        for s in summaries:
+            key = (s["stretch"], s["symbol"], s["play_config_name"])
+            grouped.setdefault(key, []).append(s)
+
+        for instances in grouped.values():
+            instances.sort(key=lambda s: s["exited"])
+        return grouped
+
+    def _compare(
+        self,
+        reference: dict[tuple, list[dict]],
+        candidate: dict[tuple, list[dict]],
+        report: EngineReport,
+    ) -> None:
+        for key in reference.keys() | candidate.keys():
+            _, symbol, play_config_name = key
+            ref_instances = reference.get(key, [])
+            cand_instances = candidate.get(key, [])
+            report.instances += max(len(ref_instances), len(cand_instances))
+
+            for n in range(max(len(ref_instances), len(cand_instances))):
+                ref = ref_instances[n] if n < len(ref_instances) else None
+                cand = cand_instances[n] if n < len(cand_instances) else None
+                divergence = self._diverges(ref, cand)
+                if divergence is None:
+                    report.matched += 1
+                    continue
+
+                field, bar = divergence
+                report.divergences.append(
+                    Divergence(
+                        symbol=symbol,
+                        play_config_name=play_config_name,
+                        bar=bar,
+                        field=field,
+                        reference=None if ref is None else ref[field],
+                        candidate=None if cand is None else cand[field],
+                    )
+                )
+                if field == "exited":
+                    # later instances start after this one exits, so they'd all be out of step
+                    break
+
+    def _diverges(self, ref: dict, cand: dict) -> tuple[str, pd.Timestamp]:
+        # (field, bar) of the first difference, or None if they agree
+        if ref is None or cand is None:
+            return "exited", (cand if ref is None else ref)["exited"]
+
+        bar = min(ref["exited"], cand["exited"])
+        if ref["exited"] != cand["exited"]:
+            return "exited", bar
+
+        for field in COMPARED_FIELDS:
+            if not math.isclose(
+                ref[field], cand[field], rel_tol=self.rel_tol, abs_tol=self.abs_tol
+            ):
+                return field, bar
+
+        return None
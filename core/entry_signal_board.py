@@ -0,0 +1,53 @@
+from .time_manager import ITimeManager
+
+import logging
+
+log = logging.getLogger(__name__)
+
+
+class EntrySignalBoard:
+    """
+    Shares waiting state results between play configs that enter the same way. Configs generated
+    for a category often only differ in their exit parameters, so their waiting states ask the
+    same question of the same symbol each tick. The first instance to ask for a (symbol,
+    entry_signal_key) pair in a tick works out the answer, and every other instance with that key
+    gets it from here.
+
+    One board is shared by all of a CategoryHandler's SymbolHandlers. Results are thrown away
+    whenever time_manager.now moves on
+    """
+
+    time_manager: ITimeManager
+    _results: dict[tuple, tuple]
+    evaluations: int
+    shared: int
+
+    def __init__(self, time_manager: ITimeManager) -> None:
+        self.time_manager = time_manager
+        self._results = dict()
+        self._now = None
+        self.evaluations = 0
+        self.shared = 0
+
+    def evaluate(self, symbol: str, entry_signal_key, check_exit):
+        # a key of None means the config can't share, so it's always evaluated
+        if entry_signal_key is None:
+            return check_exit()
+
+        now = self.time_manager.now
+        if now != self._now:
+            self._results = dict()
+            self._now = now
+
+        key = (symbol, entry_signal_key)
+        result = self._results.get(key)
+        if result is None:
+            result = check_exit()
+            self._results[key] = result
+            self.evaluations += 1
+        else:
+            self.shared += 1
+
+        # new state args get handed on to the next state, so each instance gets its own copy
+        action, new_state, new_state_args = result
+        return action, new_state, dict(new_state_args)
@@ -0,0 +1,280 @@
+from symbol import Symbol
+from typing import Callable
+import numpy as np
+
+import logging
+
+log = logging.getLogger(__name__)
+
+
+def _sparse_table(values: np.ndarray, op) -> list[np.ndarray]:
+    # table[k][i] is op over values[i : i + 2**k]
+    table = [values]
+    span = 1
+    while span * 2 <= len(values):
+        previous = table[-1]
+        table.append(op(previous[:-span], previous[span:]))
+        span *= 2
+    return table
+
+
+class LadderExits:
+    """
+    What ExitSimulator.take_profit_ladder found for each entry. exited is the bar the instance
+    terminated on, or -1 if it was still open at the end. stuck marks entries whose take profits
+    stopped selling anything (see take_profit_ladder). sells lists each sell order as (units,
+    value, filled) in the order they were placed, and rungs the bar each take profit filled on
+    """
+
+    exited: np.ndarray
+    stopped: np.ndarray
+    stuck: np.ndarray
+    sells: list[list[tuple[float, float, bool]]]
+    rungs: list[list[int]]
+
+    def __init__(self, count: int) -> None:
+        self.exited = np.full(count, -1)
+        self.stopped = np.zeros(count, dtype=bool)
+        self.stuck = np.zeros(count, dtype=bool)
+        self.sells = [[] for _ in range(count)]
+        self.rungs = [[] for _ in range(count)]
+
+
+class ExitSimulator:
+    """
+    Finds where orders would have filled over a symbol's bars without stepping through them. Block
+    maxima of High and minima of Low and Close are precomputed over power of two spans, so the
+    first bar from a start that reaches a level is found by skipping down the spans - log2(bars)
+    array lookups, for any number of starts and levels at once.
+
+    It assumes a fill model rather than asking the broker for one: a buy limit fills on the first
+    bar whose Low is at or under its price, a sell limit on the first bar whose High is at or over
+    it, both counting the bar they're placed on. Fills are whole and at the limit price, even on a
+    bar that gaps through it. That's what BackTestAPI is expected to do, but nothing here checks
+    it - EquivalenceCheck does. A stop triggers on the first bar whose aligned Close is under it,
+    the same as Instance.stop_loss_triggered()
+    """
+
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    # lookups for this many starts or fewer are scanned rather than looked up in the spans
+    scan_below: int = 8
+
+    def __init__(
+        self,
+        high: np.ndarray,
+        low: np.ndarray,
+        close: np.ndarray,
+        align_price: Callable[[float], float] = None,
+    ) -> None:
+        # columns of a DataFrame are often strided views in to a bigger block, which makes every
+        # pass over them slower
+        self.high = np.ascontiguousarray(high, dtype=np.float64)
+        self.low = np.ascontiguousarray(low, dtype=np.float64)
+        self.close = np.ascontiguousarray(close, dtype=np.float64)
+        self._align_price = align_price
+        # closes only get aligned when they're asked for, see aligned_close()
+        self._aligned_close = np.full(len(self.close), np.nan)
+
+        self._max_high = _sparse_table(self.high, np.maximum)
+        self._min_low = _sparse_table(self.low, np.minimum)
+        self._min_close = _sparse_table(self.close, np.minimum)
+
+    def __len__(self) -> int:
+        return len(self.close)
+
+    def aligned_close(self, positions) -> np.ndarray:
+        positions = np.asarray(positions, dtype=np.int64)
+        if self._align_price is None:
+            return self.close[positions]
+
+        missing = positions[np.isnan(self._aligned_close[positions])]
+        for p in np.unique(missing):
+            self._aligned_close[p] = self._align_price(self.close[p])
+        return self._aligned_close[positions]
+
+    def _first(self, table, starts, levels, ends, misses) -> np.ndarray:
+        # first position in [start, end) whose block doesn't miss level, or -1
+        starts = np.asarray(starts, dtype=np.int64)
+        levels = np.asarray(levels, dtype=np.float64)
+        if ends is None:
+            ends = len(self)
+        ends = np.broadcast_to(np.asarray(ends, dtype=np.int64), starts.shape)
+        ends = np.minimum(ends, len(self))
+        if len(self) == 0:
+            return np.full(starts.shape, -1)
+
+        if len(starts) <= self.scan_below:
+            return self._scan(table[0], starts, levels, ends, misses)
+
+        position = starts.copy()
+        for k in range(len(table) - 1, -1, -1):
+            span = 1 << k
+            fits = position + span <= ends
+            blocks = table[k][np.where(fits, position, 0)]
+            # the whole block misses, so the first hit is past it
+            position = np.where(fits & misses(blocks, levels), position + span, position)
+
+        return np.where(position < ends, position, -1)
+
+    @staticmethod
+    def _scan(values, starts, levels, ends, misses) -> np.ndarray:
+        # one at a time, in chunks that grow from 64 bars - a hit is usually close by, so for a
+        # handful of lookups this beats the fixed cost of going down every span
+        found = np.full(starts.shape, -1)
+        for n, (start, level, end) in enumerate(zip(starts, levels, ends)):
+            chunk = 64
+            while start < end:
+                stop = min(start + chunk, end)
+                hits = np.flatnonzero(~misses(values[start:stop], level))
+                if len(hits):
+                    found[n] = start + hits[0]
+                    break
+                start = stop
+                chunk *= 4
+        return found
+
+    def first_high_at_or_above(self, starts, levels, ends=None) -> np.ndarray:
+        return self._first(self._max_high, starts, levels, ends, np.less)
+
+    def first_low_at_or_below(self, starts, levels, ends=None) -> np.ndarray:
+        return self._first(self._min_low, starts, levels, ends, np.greater)
+
+    def first_close_below(self, starts, levels, ends=None) -> np.ndarray:
+        # levels are aligned prices, so the aligned close can only be under one where the raw
+        # close is. the raw closes give the candidates, and only those get aligned and checked
+        starts = np.array(starts, dtype=np.int64)
+        levels = np.asarray(levels, dtype=np.float64)
+        if ends is None:
+            ends = len(self)
+        ends = np.broadcast_to(np.asarray(ends, dtype=np.int64), starts.shape)
+
+        found = np.full(starts.shape, -1)
+        pending = np.arange(len(starts))
+        while len(pending):
+            candidates = self._first(
+                self._min_close,
+                starts[pending],
+                levels[pending],
+                ends[pending],
+                np.greater_equal,
+            )
+            hit = candidates >= 0
+            pending, candidates = pending[hit], candidates[hit]
+
+            below = self.aligned_close(candidates) < levels[pending]
+            found[pending[below]] = candidates[below]
+            # rounding took the rest back up to the level, so carry on from the bar after
+            pending = pending[~below]
+            starts[pending] = candidates[~below] + 1
+
+        return found
+
+    def take_profit_ladder(
+        self,
+        entries: np.ndarray,
+        entry_prices: np.ndarray,
+        stops: np.ndarray,
+        units: np.ndarray,
+        risk_multiplier: float,
+        pct_to_sell: float,
+        symbol: Symbol,
+        end: int = None,
+    ) -> LadderExits:
+        """
+        Exits for positions bought on the entries bars, the way StateTakingProfit and
+        StateStoppingLoss work them: a take profit for pct_to_sell of what's held at entry + risk x
+        risk_multiplier x (take profits filled so far + 1), placed again on the bar the last one
+        filled, until nothing is held or the stop triggers. A take profit that fills on the stop
+        bar still counts, then the rest is sold at the Close. Entries whose next take profit
+        wouldn't change what's held are marked stuck and left open.
+
+        Every entry's next rung is looked up in the same batch, so this takes as many rounds as
+        the longest ladder
+        """
+        count = len(entries)
+        end = len(self) if end is None else min(end, len(self))
+        exits = LadderExits(count)
+
+        entry_prices = [float(p) for p in entry_prices]
+        stops = [float(s) for s in stops]
+        units = [float(u) for u in units]
+        sold = [0.0] * count
+        filled = [0] * count
+        risks = []
+        for entry, stop in zip(entry_prices, stops):
+            risk = entry - stop
+            if risk < 0:
+                # same hack as StateTakingProfit, for market buys that fill under the stop
+                risk = symbol.align_price(stop - entry)
+            risks.append(risk)
+
+        leg_starts = np.asarray(entries, dtype=np.int64).copy()
+        active = list(range(count))
+        while active:
+            targets = []
+            to_sell = []
+            progressing = []
+            for i in active:
+                held = units[i] - sold[i]
+                this_sell = symbol.align_quantity_increment(pct_to_sell * held)
+                if units[i] - (sold[i] + this_sell) == held:
+                    # eg. no risk means every rung fills on the same bar, selling less each time
+                    # until it doesn't change anything. the state machine never gets out of that
+                    # either, so it's left open
+                    exits.stuck[i] = True
+                    continue
+
+                progressing.append(i)
+                to_sell.append(this_sell)
+                targets.append(
+                    symbol.align_price(
+                        entry_prices[i] + risk_multiplier * risks[i] * (filled[i] + 1)
+                    )
+                )
+
+            if not progressing:
+                break
+
+            starts = leg_starts[progressing]
+            filled_at = self.first_high_at_or_above(starts, targets, end)
+            stopped_at = self.first_close_below(starts, [stops[i] for i in progressing], end)
+
+            active = []
+            for n, i in enumerate(progressing):
+                fill, stop = filled_at[n], stopped_at[n]
+                sells = exits.sells[i]
+                if stop >= 0 and (fill < 0 or stop <= fill):
+                    if fill == stop:
+                        sells.append((to_sell[n], targets[n] * to_sell[n], True))
+                        sold[i] += to_sell[n]
+                        exits.rungs[i].append(int(fill))
+                    else:
+                        sells.append((to_sell[n], 0, False))
+
+                    held = units[i] - sold[i]
+                    if held > 0:
+                        liquidate = symbol.align_quantity_increment(held)
+                        sells.append((liquidate, float(self.close[stop]) * liquidate, True))
+
+                    exits.exited[i] = stop
+                    exits.stopped[i] = True
+                    continue
+
+                if fill < 0:
+                    # still open when the bars run out
+                    continue
+
+                sells.append((to_sell[n], targets[n] * to_sell[n], True))
+                sold[i] += to_sell[n]
+                filled[i] += 1
+                exits.rungs[i].append(int(fill))
+                if units[i] - sold[i] == 0:
+                    exits.exited[i] = fill
+                    continue
+
+                leg_starts[i] = fill
+                active.append(i)
+
+        return exits
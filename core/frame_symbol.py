@@ -0,0 +1,124 @@
+from math import floor
+import numpy as np
+import pandas as pd
+
+from .time_manager import ITimeManager
+from .ita import ITA
+
+import logging
+
+log = logging.getLogger(__name__)
+
+OHLC_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+def synthetic_bars(
+    periods: int,
+    seed: int = 0,
+    start: str = "2022-01-01",
+    interval: str = "5min",
+    start_price: float = 100,
+    volatility: float = 0.004,
+    spread: float = 0.002,
+) -> pd.DataFrame:
+    # random walk - the same seed always gives the same bars
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(start, periods=periods, freq=interval)
+    close = start_price * np.exp(np.cumsum(rng.normal(0, volatility, periods)))
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, spread, periods)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, spread, periods)))
+    volume = rng.integers(1, 1000, periods).astype(float)
+    return pd.DataFrame(
+        {"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume},
+        index=index,
+    )
+
+
+def read_bars(path: str, index_col: str = None) -> pd.DataFrame:
+    # recorded OHLC from a CSV - the index column is the first one unless named
+    bars = pd.read_csv(path, index_col=index_col or 0, parse_dates=True)
+    missing = [c for c in OHLC_COLUMNS if c not in bars.columns]
+    if missing:
+        raise ValueError(f"{path} is missing columns {missing}")
+
+    return bars[OHLC_COLUMNS].sort_index()
+
+
+class FrameOHLC:
+    """The parts of Symbol.ohlc that the back test uses, over bars that are already in memory"""
+
+    bars: pd.DataFrame
+    time_manager: ITimeManager
+
+    def __init__(self, bars: pd.DataFrame, time_manager: ITimeManager) -> None:
+        self.bars = bars.copy()
+        self.time_manager = time_manager
+
+    def refresh_cache(self) -> None:
+        # nothing to fetch
+        ...
+
+    def get_first(self) -> pd.Series:
+        return self.bars.iloc[0]
+
+    def get_range(self) -> pd.DataFrame:
+        return self.bars.loc[: self.time_manager.now]
+
+    def get_latest(self) -> pd.Series:
+        return self.get_range().iloc[-1]
+
+    def apply_ta(self, ta_algo: ITA) -> None:
+        df = ta_algo.do_ta(self.bars).df
+        existing = [c for c in df.columns if c in self.bars.columns]
+        self.bars = self.bars.drop(columns=existing).join(df)
+
+
+class FrameSymbol:
+    """
+    Stands in for Symbol when back testing over a given DataFrame of bars (synthetic, or recorded
+    earlier) instead of fetching them. Prices and quantities are aligned to fixed increments, so
+    runs are repeatable without looking anything up from the exchange
+    """
+
+    yf_symbol: str
+    ohlc: FrameOHLC
+    time_manager: ITimeManager
+    min_price_increment: float
+    min_quantity_increment: float
+    notional_units: bool
+
+    def __init__(
+        self,
+        yf_symbol: str,
+        bars: pd.DataFrame,
+        time_manager: ITimeManager = None,
+        min_price_increment: float = 0.0001,
+        min_quantity_increment: float = 0.0001,
+        notional_units: bool = False,
+    ) -> None:
+        self.yf_symbol = yf_symbol
+        self.ohlc = FrameOHLC(bars, time_manager)
+        self.time_manager = time_manager
+        self.min_price_increment = min_price_increment
+        self.min_quantity_increment = min_quantity_increment
+        self.notional_units = notional_units
+
+    def align_price(self, unit_price: float) -> float:
+        increments = round(unit_price / self.min_price_increment)
+        return round(increments * self.min_price_increment, 8)
+
+    def align_quantity(self, quantity: float) -> float:
+        increments = floor(quantity / self.min_quantity_increment)
+        return round(increments * self.min_quantity_increment, 8)
+
+    def align_quantity_increment(self, quantity: float) -> float:
+        # like align_quantity, but anything under one increment is left as is rather than zeroed
+        aligned = self.align_quantity(quantity)
+        return aligned if aligned > 0 else quantity
+
+    def __repr__(self) -> str:
+        return self.yf_symbol
+
+    def __str__(self) -> str:
+        return self.yf_symbol
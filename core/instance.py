@@ -9,35 +9,54 @@ from .state_terminated import StateTerminated
 from .state_stopping_loss import StateStoppingLoss
 from .state_taking_profit import StateTakingProfit
 from .time_manager import ITimeManager
+from .order_ledger import OrderLedger
 from broker_api import IOrderResult
 from .exceptions import BuyOrderAlreadySet, SellOrderAlreadySet
 
-from pythonjsonlogger import jsonlogger
-from logbeam import CloudWatchLogsHandler
+from .log_sinks import INSTANCE_LOGGER, SINK_CLOUDWATCH, configure_sink
 import logging
 
 log = logging.getLogger(__name__)
 
 # logging insanity
-instance_log = logging.getLogger("cloudwatch_messages")
+instance_log = logging.getLogger(INSTANCE_LOGGER)
 # instance_log.propagate = False
-format_str = "%(levelname)%(message)"
-formatter = jsonlogger.JsonFormatter(format_str)
-handler = CloudWatchLogsHandler(
-    log_group_name="tabot",
-    log_stream_name="instances",
-    buffer_duration=10000,
-    batch_count=1000,
-)
-handler.setFormatter(formatter)
 instance_log.setLevel(51)
-instance_log.addHandler(handler)
+# CloudWatch unless the process says otherwise with log_sinks.configure_logging(). nothing is
+# created until the first record goes out
+configure_sink(SINK_CLOUDWATCH)
 
 instances_log = ShonkyLog(instance_log)
 
 
 class Instance(ABC):
+    # thousands of these can be live at once in a sweep, so no per-instance __dict__
+    __slots__ = (
+        "config",
+        "parent_controller",
+        "time_manager",
+        "broker",
+        "symbol",
+        "ohlc",
+        "bars",
+        "signal_cache",
+        "symbol_str",
+        "telemetry",
+        "start_timestamp",
+        "started",
+        "_entry_price",
+        "_stop_price",
+        "_target_price",
+        "_buy_order",
+        "_active_sales_order",
+        "_ledger",
+        "_id",
+        "_state",
+    )
+
     _state: State
+    # every instance logs through the same logger
+    log = instances_log
 
     def __init__(
         self, template: PlayConfig, play_controller, state=None, state_args=None
@@ -48,6 +67,8 @@ class Instance(ABC):
         self.broker = play_controller.broker
         self.symbol = play_controller.symbol
         self.ohlc = play_controller.symbol.ohlc
+        self.bars = play_controller.bar_window
+        self.signal_cache = play_controller.signal_cache
         self.symbol_str = play_controller.symbol.yf_symbol
         self.start_timestamp = datetime.utcnow()
         self.started = True
@@ -56,10 +77,8 @@ class Instance(ABC):
         self._target_price = None
         self._buy_order = None
         self._active_sales_order = None
-        self._sales_orders = {}
-        log_group = "tabot-state-machine"
-        unique_id = self._generate_id()
-        self.id = f"{self.symbol_str}-{self.config.name}-{unique_id}"
+        self._ledger = OrderLedger()
+        self._id = None
         self.telemetry = self.parent_controller.telemetry
         """
         # logging insanity
@@ -79,7 +98,6 @@ class Instance(ABC):
 
         self.log = ShonkyLog(instance_log)
         """
-        self.log = instances_log
 
         if state == None:
             self._state = play_controller.play_config.state_waiting(
@@ -91,6 +109,13 @@ class Instance(ABC):
     def __repr__(self):
         return self.id
 
+    @property
+    def id(self) -> str:
+        # only generated and formatted the first time something asks for it
+        if self._id is None:
+            self._id = f"{self.symbol_str}-{self.config.name}-{self._generate_id()}"
+        return self._id
+
     def _generate_id(self, length: int = 6):
         return "instance-" + uuid.uuid4().hex[:length].upper()
 
@@ -104,7 +129,7 @@ class Instance(ABC):
                 break
 
             elif instance_action == State.STATE_MOVE:
-                self.log.log(9, f"STATE_MOVE from {self.state} to {new_state}")
+                self.log.log(9, lambda: f"STATE_MOVE from {self.state} to {new_state}")
                 self.state = new_state
 
             elif instance_action == State.STATE_SPLIT:
@@ -124,22 +149,22 @@ class Instance(ABC):
                 raise NotImplementedError("This should never happen...")
 
     def stop(self, hard_stop: bool = False):
-        self.log.info(f"Stopping instance {self} (hard_stop: {hard_stop})")
+        self.log.info(lambda: f"Stopping instance {self} (hard_stop: {hard_stop})")
         state = self.state
         if isinstance(state, StateTerminated):
             # nothing to do
-            self.log.info(f"Can't stop instance {self} - already in Terminated state")
+            self.log.info(lambda: f"Can't stop instance {self} - already in Terminated state")
         elif isinstance(state, StateStoppingLoss) or isinstance(
             state, StateTakingProfit
         ):
             if hard_stop:
-                self.log.warning(f"Hard stopping {self}")
+                self.log.warning(lambda: f"Hard stopping {self}")
                 self.state = self.parent_controller.play_config.state_terminated
             else:
-                self.log.info(f"Instance {self} is in state {state} - skipping stop")
+                self.log.info(lambda: f"Instance {self} is in state {state} - skipping stop")
         else:
             # fair game
-            self.log.info(f"Stopping {self}")
+            self.log.info(lambda: f"Stopping {self}")
             self.state = self.parent_controller.play_config.state_terminated
 
         self.started = False
@@ -156,10 +181,10 @@ class Instance(ABC):
             raise RuntimeError(_msg)
 
         self._state.do_exit()
-        self.log.log(9, f"do_exit() successful on {self._state}")
+        self.log.log(9, lambda: f"do_exit() successful on {self._state}")
 
         self._state = new_state(previous_state=self._state)
-        self.log.log(9, f"successfully set new state to {self._state}")
+        self.log.log(9, lambda: f"successfully set new state to {self._state}")
 
     @property
     def stop_loss_price(self):
@@ -198,11 +223,7 @@ class Instance(ABC):
 
     @property
     def units_sold(self):
-        units_sold = 0
-        for sale_id in self.filled_sales_orders:
-            units_sold += self.filled_sales_orders[sale_id].filled_unit_quantity
-
-        return units_sold
+        return self._ledger.filled_units
 
     @property
     def total_buy_value(self):
@@ -216,11 +237,7 @@ class Instance(ABC):
 
     @property
     def total_sell_value(self):
-        earned = 0
-        for order_id, order in self._sales_orders.items():
-            if order.filled_total_value:
-                earned += order.filled_total_value
-        return earned
+        return self._ledger.filled_value
 
     @property
     def total_gain(self):
@@ -234,11 +251,11 @@ class Instance(ABC):
             return None
 
         # otherwise refresh it and return it
-        existing_order = self._sales_orders[self._active_sales_order.order_id]
+        existing_order = self._ledger.orders[self._active_sales_order.order_id]
         self._active_sales_order = self.broker.get_order(existing_order.order_id)
         # filled sales order to be updated here
         if self._active_sales_order.status_text == "filled":
-            self._sales_orders[existing_order.order_id] = self._active_sales_order
+            self._ledger.record(self._active_sales_order)
 
         return self._active_sales_order
 
@@ -262,10 +279,10 @@ class Instance(ABC):
         # return open_orders
 
     def stop_loss_triggered(self):
-        last_close = self.symbol.align_price(self.ohlc.get_latest().Close)
+        last_close = self.symbol.align_price(self.bars.close)
         if last_close < self.stop_loss_price:
             self.log.warning(
-                f"Stop loss triggered",
+                "Stop loss triggered",
                 state_parameters={
                     "last_close": last_close,
                     "stop loss": self.stop_loss_price,
@@ -274,17 +291,13 @@ class Instance(ABC):
             return True
         self.log.log(
             9,
-            f"Stop loss was not triggered. Last close was {last_close} vs stop loss of {self.stop_loss_price}",
+            lambda: f"Stop loss was not triggered. Last close was {last_close} vs stop loss of {self.stop_loss_price}",
         )
         return False
 
     @property
     def filled_sales_orders(self):
-        filled_orders = {}
-        for sale_id in self._sales_orders:
-            if self._sales_orders[sale_id].status_summary == "filled":
-                filled_orders[sale_id] = self._sales_orders[sale_id]
-        return filled_orders
+        return self._ledger.filled_orders
 
     @property
     def units_held(self):
@@ -293,7 +306,7 @@ class Instance(ABC):
     @property
     def take_profit_multiplier(self):
         multiplier = 1
-        multiplier += len(self.filled_sales_orders)
+        multiplier += self._ledger.filled_count
         return multiplier
 
     @property
@@ -304,9 +317,39 @@ class Instance(ABC):
     def entry_price(self):
         return self._entry_price
 
+    def summary(self) -> dict:
+        _sell_value = self.total_sell_value
+        _buy_value = self.total_buy_value
+        _gained = _sell_value - _buy_value
+        _buy_units = self.units_bought
+        _avg_buy_price = 0 if _buy_value == 0 else _buy_value / _buy_units
+        _avg_sell_price = 0 if _sell_value == 0 else _sell_value / _buy_units
+        _buy_order_count = 1 if self.buy_order else 0
+        _sell_order_count = len(self._ledger)
+        _sell_order_filled_count = self._ledger.filled_count
+
+        play_config = self.parent_controller.play_config
+        return {
+            "run_id": self.parent_controller.run_id,
+            "weather_condition": play_config.market_condition,
+            "symbol": str(self.symbol),
+            "symbol_group": play_config.symbol_category,
+            "play_config_name": play_config.name,
+            "units": _buy_units,
+            "bought_value": _buy_value,
+            "sold_value": _sell_value,
+            "total_gain": _gained,
+            "average_buy_price": _avg_buy_price,
+            "average_sell_price": _avg_sell_price,
+            "buy_order_count": _buy_order_count,
+            "sell_order_count": _sell_order_count,
+            "sell_order_filled_count": _sell_order_filled_count,
+            "instance_id": self.id,
+        }
+
     def add_sell_order(self, order: IOrderResult):
         self.open_sales_order = order
-        self._sales_orders[order.order_id] = order
+        self._ledger.record(order)
 
     # just basic passthrough
     def buy_limit(self, units: float, unit_price: float):
@@ -1,15 +1,36 @@
+from .instance_summary import InstanceSummary
+
+
 class InstanceList:
     instances: list
 
     def __init__(self) -> None:
         self.instances = []
+        # terminated instances don't change any more, so their gain is totalled as they're added
+        # and only the live ones get rescanned
+        self._terminated_gain = 0
+        self._live = []
 
     def append(self, new_instance):
         self.instances.append(new_instance)
+        if isinstance(new_instance, InstanceSummary):
+            self._terminated_gain += new_instance.total_buy_value - new_instance.total_sell_value
+        else:
+            self._live.append(new_instance)
+
+    def extend(self, other: "InstanceList"):
+        self.instances += other.instances
+        self._terminated_gain += other._terminated_gain
+        self._live += other._live
+
+    def __len__(self) -> int:
+        return len(self.instances)
 
     @property
     def total_gain(self):
+        # Instance.total_gain is buy - sell, and InstanceSummary's is the other way round like the
+        # emitted summary, so total from the values to keep to what Instance has always given
         gain = 0
-        for i in self.instances:
-            gain += i.total_gain
-        return gain
+        for i in self._live:
+            gain += i.total_buy_value - i.total_sell_value
+        return gain + self._terminated_gain
@@ -0,0 +1,73 @@
+from .play_config import PlayConfig
+
+
+class InstanceSummary:
+    """
+    What's kept of an Instance once it's terminated - the fields StateTerminated emits, and the
+    play config it ran under so it can still be matched by SymbolPlay.get_instances(). The Instance
+    itself (states, orders, broker and symbol references) can then be garbage collected, which
+    keeps long back tests from growing with every instance they've ever run.
+
+    Has total_buy_value and total_sell_value like Instance, so the two can be totalled together
+    """
+
+    FIELDS = (
+        "run_id",
+        "weather_condition",
+        "symbol",
+        "symbol_group",
+        "play_config_name",
+        "units",
+        "bought_value",
+        "sold_value",
+        "total_gain",
+        "average_buy_price",
+        "average_sell_price",
+        "buy_order_count",
+        "sell_order_count",
+        "sell_order_filled_count",
+        "instance_id",
+    )
+
+    __slots__ = FIELDS + ("config",)
+
+    config: PlayConfig
+    run_id: str
+    weather_condition: str
+    symbol: str
+    symbol_group: str
+    play_config_name: str
+    units: float
+    bought_value: float
+    sold_value: float
+    total_gain: float
+    average_buy_price: float
+    average_sell_price: float
+    buy_order_count: int
+    sell_order_count: int
+    sell_order_filled_count: int
+    instance_id: str
+
+    def __init__(self, config: PlayConfig, **fields) -> None:
+        self.config = config
+        for field in self.FIELDS:
+            setattr(self, field, fields[field])
+
+    @classmethod
+    def from_instance(cls, instance) -> "InstanceSummary":
+        return cls(config=instance.config, **instance.summary())
+
+    @property
+    def total_buy_value(self) -> float:
+        return self.bought_value
+
+    @property
+    def total_sell_value(self) -> float:
+        return self.sold_value
+
+    def as_dict(self) -> dict:
+        # same dict as Instance.summary()
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def __repr__(self) -> str:
+        return f"InstanceSummary {self.instance_id}"
@@ -2,7 +2,28 @@ from abc import ABC, abstractmethod
 import pandas as pd
 
 
+class ITAStream(ABC):
+    """
+    Incremental version of an ITA - holds whatever recursion state the algo needs so that each new
+    bar costs O(1) rather than re-running the algo over the whole history
+    """
+
+    @abstractmethod
+    def update(self, new_bar: pd.Series) -> dict:
+        # returns the TA columns for new_bar, same names and values do_ta would give for that row
+        ...
+
+
 class ITA(ABC):
+    # columns the algo reads and the columns it adds. TAPipeline uses these to work out which
+    # algos have to run before which
+    inputs: tuple[str, ...] = ("Open", "High", "Low", "Close", "Volume")
+    outputs: tuple[str, ...] = ()
+
     @abstractmethod
     def do_ta(ohlc_data: pd.DataFrame):
         ...
+
+    def stream(ohlc_data: pd.DataFrame) -> ITAStream:
+        # returns an ITAStream warmed up on ohlc_data, ready to be fed the next bar
+        raise NotImplementedError("This TA algo does not support streaming updates")
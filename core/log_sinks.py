@@ -0,0 +1,136 @@
+from functools import partial
+import logging
+import threading
+
+from .shonky_log import ShonkyLog
+
+log = logging.getLogger(__name__)
+
+SINK_NULL = "null"
+SINK_FILE = "file"
+SINK_CLOUDWATCH = "cloudwatch"
+
+# instance logs all go through this logger - see instance.py
+INSTANCE_LOGGER = "cloudwatch_messages"
+
+
+def _json_formatter() -> logging.Formatter:
+    from pythonjsonlogger import jsonlogger
+
+    return jsonlogger.JsonFormatter("%(levelname)%(message)")
+
+
+def null_sink() -> logging.Handler:
+    return logging.NullHandler()
+
+
+def file_sink(
+    filename: str = "instances.log",
+    max_bytes: int = 50 * 1024 * 1024,
+    backup_count: int = 5,
+) -> logging.Handler:
+    from logging.handlers import RotatingFileHandler
+
+    handler = RotatingFileHandler(
+        filename=filename, maxBytes=max_bytes, backupCount=backup_count
+    )
+    handler.setFormatter(_json_formatter())
+    return handler
+
+
+def cloudwatch_sink(
+    log_group_name: str = "tabot",
+    log_stream_name: str = "instances",
+    buffer_duration: int = 10000,
+    batch_count: int = 1000,
+) -> logging.Handler:
+    # only imported (and AWS clients only set up) when something is actually logged
+    from logbeam import CloudWatchLogsHandler
+
+    handler = CloudWatchLogsHandler(
+        log_group_name=log_group_name,
+        log_stream_name=log_stream_name,
+        buffer_duration=buffer_duration,
+        batch_count=batch_count,
+    )
+    handler.setFormatter(_json_formatter())
+    return handler
+
+
+SINKS = {
+    SINK_NULL: null_sink,
+    SINK_FILE: file_sink,
+    SINK_CLOUDWATCH: cloudwatch_sink,
+}
+
+
+def register_sink(name: str, factory) -> None:
+    # factory is called with configure_sink's kwargs and returns a logging.Handler
+    SINKS[name] = factory
+
+
+class LazyHandler(logging.Handler):
+    """Stands in for a sink's handler and only builds it when the first record comes through"""
+
+    def __init__(self, sink: str, factory) -> None:
+        super().__init__()
+        self.sink = sink
+        self._factory = factory
+        self._handler = None
+        self._build_lock = threading.Lock()
+
+    @property
+    def handler(self) -> logging.Handler:
+        if self._handler is None:
+            with self._build_lock:
+                if self._handler is None:
+                    log.debug(f"Creating {self.sink} log sink")
+                    self._handler = self._factory()
+        return self._handler
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.handler.handle(record)
+
+    def flush(self) -> None:
+        if self._handler is not None:
+            self._handler.flush()
+
+    def close(self) -> None:
+        if self._handler is not None:
+            self._handler.close()
+        super().close()
+
+
+def configure_sink(
+    sink: str = SINK_CLOUDWATCH, logger_name: str = INSTANCE_LOGGER, **kwargs
+) -> LazyHandler:
+    """
+    Points logger_name at the named sink, replacing whatever sink was configured before. Nothing
+    is created until the first record is emitted
+    """
+    if sink not in SINKS:
+        raise ValueError(f"Unknown log sink {sink}. Known sinks are {list(SINKS)}")
+
+    logger = logging.getLogger(logger_name)
+    for existing in [h for h in logger.handlers if isinstance(h, LazyHandler)]:
+        logger.removeHandler(existing)
+        existing.close()
+
+    handler = LazyHandler(sink, partial(SINKS[sink], **kwargs))
+    logger.addHandler(handler)
+    return handler
+
+
+def configure_logging(
+    quiet: bool = False, sink: str = SINK_CLOUDWATCH, **kwargs
+) -> LazyHandler:
+    """
+    Logging setup for the process, to be called once by whatever starts it eg. a back test script
+    or a parallel back test worker. quiet drops instance log calls below ERROR (see
+    ShonkyLog.set_quiet) and sink is where instance logs go, see configure_sink.
+
+    Both are process wide, which is why PlayOrchestrator doesn't set them - several orchestrators
+    in one process eg. a sweep next to an equivalence check would change each other's logging
+    """
+    ShonkyLog.set_quiet(quiet)
+    return configure_sink(sink, **kwargs)
@@ -0,0 +1,217 @@
+from symbol import Symbol
+import numpy as np
+import pandas as pd
+
+from .weather import IWeatherReader, WeatherResult
+from .time_manager import ITimeManager, TimeManagerNotStartedError
+
+import logging
+
+log = logging.getLogger(__name__)
+
+REGIME_BULL = "bull"
+REGIME_BEAR = "bear"
+REGIME_SIDEWAYS = "sideways"
+REGIME_CHOPPY = "choppy"
+REGIMES = (REGIME_BULL, REGIME_BEAR, REGIME_SIDEWAYS, REGIME_CHOPPY)
+
+
+class RegimeChange:
+    timestamp: pd.Timestamp
+    category: str
+    previous: str
+    condition: str
+
+    def __init__(self, timestamp, category, previous, condition) -> None:
+        self.timestamp = timestamp
+        self.category = category
+        self.previous = previous
+        self.condition = condition
+
+    def __repr__(self) -> str:
+        return (
+            f"RegimeChange {self.category} at {self.timestamp}: "
+            f"{self.previous} -> {self.condition}"
+        )
+
+
+class MarketRegimeWeather(IWeatherReader):
+    """
+    Weather from each symbol category's own bars. The category's symbols are rebased to 1 and
+    averaged in to one price, and over a trailing window of bars
+
+        trend       - slope of a least squares line through the log price, across the window
+        return      - change in the log price across the window
+        volatility  - standard deviation of the log returns, scaled up to the window
+
+    A category is bull or bear when its trend is at least trend_strength x volatility and the
+    window's return agrees with it. Otherwise it's choppy when volatility is over choppy_volatility
+    x its median of the last baseline windows, and sideways when it isn't. Every bar only looks at
+    bars up to and including itself. Bars before the first full window get default.
+
+    Everything is worked out over all the bars up front, so get_all() just looks up the current bar
+    and hands back the same WeatherItems each time. With market_conditions, a regime the play
+    library has no plays for leaves the category in the regime it was in before
+    """
+
+    _tm: ITimeManager
+    regimes: dict[str, pd.Series]
+    window: int
+    trend_strength: float
+    choppy_volatility: float
+    baseline: int
+    default: str
+
+    def __init__(
+        self,
+        tm: ITimeManager,
+        symbols: dict[str, dict[str, Symbol]],
+        market_conditions: set[str] = None,
+        window: int = 48,
+        trend_strength: float = 1.0,
+        choppy_volatility: float = 1.0,
+        baseline: int = 10,
+        default: str = REGIME_SIDEWAYS,
+    ) -> None:
+        if window < 2:
+            raise ValueError(f"Regime window has to be at least 2 bars, got {window}")
+        if market_conditions is not None and default not in market_conditions:
+            raise ValueError(
+                f"Default regime {default} isn't one of the market conditions {market_conditions}"
+            )
+
+        self._tm = tm
+        self.window = window
+        self.trend_strength = trend_strength
+        self.choppy_volatility = choppy_volatility
+        self.baseline = baseline
+        self.default = default
+
+        closes = {
+            category: pd.DataFrame({s: s_obj.ohlc.bars.Close for s, s_obj in cat_symbols.items()})
+            for category, cat_symbols in symbols.items()
+        }
+        # one timeline for every category, so a single position serves them all
+        self._index = pd.DatetimeIndex([])
+        for c in closes.values():
+            self._index = self._index.union(c.index)
+        # as nanoseconds - comparing Timestamps out of a DatetimeIndex is slow for every tick
+        self._times = self._index.asi8
+
+        supported = list(REGIMES)
+        if market_conditions is not None:
+            supported = [r for r in REGIMES if r in market_conditions]
+
+        self.regimes = dict()
+        codes = []
+        for category, c in closes.items():
+            code = self._classify(c.reindex(self._index).ffill())
+            # regimes with no plays are dropped and the one before carries on
+            code = pd.Series(code, index=self._index, dtype=float)
+            code[~code.isin([REGIMES.index(r) for r in supported])] = np.nan
+            code = code.ffill().fillna(REGIMES.index(default)).to_numpy(dtype=np.int8)
+            codes.append(code)
+            self.regimes[category] = pd.Series(np.array(REGIMES)[code], index=self._index)
+
+        self._categories = list(closes)
+        self._symbols = {category: set(cat_symbols) for category, cat_symbols in symbols.items()}
+        self._build_snapshots(np.column_stack(codes) if codes else np.zeros((0, 0)))
+        self._position = 0
+
+    def _classify(self, closes: pd.DataFrame) -> np.ndarray:
+        # regime code for every bar, indexing in to REGIMES
+        rebased = closes / closes.bfill().iloc[0]
+        price = np.log(rebased.mean(axis=1, skipna=True))
+        returns = price.diff()
+        w = self.window
+
+        t = pd.Series(np.arange(len(price), dtype=float), index=price.index)
+        slope = price.rolling(w).cov(t) / t.rolling(w).var()
+        trend = slope * (w - 1)
+        change = price - price.shift(w - 1)
+        volatility = returns.rolling(w - 1).std() * np.sqrt(w - 1)
+        typical = volatility.rolling(self.baseline * w, min_periods=1).median()
+
+        trend, change = trend.to_numpy(), change.to_numpy()
+        volatility, typical = volatility.to_numpy(), typical.to_numpy()
+        with np.errstate(invalid="ignore"):
+            trending = (np.abs(trend) >= self.trend_strength * volatility) & (
+                np.sign(trend) == np.sign(change)
+            )
+            choppy = volatility > self.choppy_volatility * typical
+
+        code = np.full(len(price), REGIMES.index(REGIME_SIDEWAYS), dtype=float)
+        code[~trending & choppy] = REGIMES.index(REGIME_CHOPPY)
+        code[trending & (trend > 0)] = REGIMES.index(REGIME_BULL)
+        code[trending & (trend < 0)] = REGIMES.index(REGIME_BEAR)
+        # too early for a full window, or a flat window with no trend or volatility to speak of
+        code[np.isnan(trend) | np.isnan(volatility) | (volatility == 0)] = np.nan
+        return code
+
+    def _build_snapshots(self, codes: np.ndarray) -> None:
+        # a WeatherResult for every stretch of bars where no category's regime changes. they're
+        # never changed once built, so PlayOrchestrator can hold on to the last one it was given
+        items = {
+            (category, regime): WeatherResult.WeatherItem(
+                symbols=self._symbols[category], condition=regime
+            )
+            for category in self._categories
+            for regime in REGIMES
+        }
+
+        changed = np.ones(len(codes), dtype=bool)
+        changed[1:] = (codes[1:] != codes[:-1]).any(axis=1)
+        self._snapshot_at = np.cumsum(changed) - 1
+        self._snapshots = [
+            {
+                category: items[(category, REGIMES[row[n]])]
+                for n, category in enumerate(self._categories)
+            }
+            for row in codes[changed]
+        ]
+
+        self._changes = []
+        for n, category in enumerate(self._categories):
+            column = codes[:, n]
+            for p in np.flatnonzero(column[1:] != column[:-1]) + 1:
+                self._changes.append(
+                    RegimeChange(
+                        timestamp=self._index[p],
+                        category=category,
+                        previous=REGIMES[column[p - 1]],
+                        condition=REGIMES[column[p]],
+                    )
+                )
+        self._changes.sort(key=lambda c: c.timestamp)
+
+    def _current_position(self) -> int:
+        try:
+            now = self._tm.now
+        except TimeManagerNotStartedError:
+            # eg. PlayOrchestrator reading the weather before it starts the clock
+            return 0
+
+        # ticks move forward a bar at a time, so it's usually this bar or the next one
+        now = now.value
+        times = self._times
+        p = self._position
+        for step in (p, p + 1):
+            if step < len(times) and times[step] <= now:
+                if step + 1 == len(times) or times[step + 1] > now:
+                    self._position = step
+                    return step
+
+        self._position = max(int(times.searchsorted(now, side="right")) - 1, 0)
+        return self._position
+
+    def get_all(self) -> dict[str, WeatherResult.WeatherItem]:
+        return self._snapshots[self._snapshot_at[self._current_position()]]
+
+    def get_one(self, category: str) -> WeatherResult.WeatherItem:
+        return self.get_all()[category]
+
+    def change_points(self, category: str = None) -> list[RegimeChange]:
+        # every bar a category's regime changes on, in time order
+        if category is None:
+            return list(self._changes)
+        return [c for c in self._changes if c.category == category]
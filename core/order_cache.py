@@ -0,0 +1,126 @@
+from broker_api import ITradeAPI, BackTestAPI, IOrderResult
+
+from .time_manager import ITimeManager
+
+import logging
+
+log = logging.getLogger(__name__)
+
+
+class BackTestBulkAPI(BackTestAPI):
+    """BackTestAPI plus a bulk get_orders, so OrderCache can refresh every open order in one call"""
+
+    def get_orders(self, order_ids: list[str]) -> list[IOrderResult]:
+        return [self.get_order(order_id) for order_id in order_ids]
+
+
+class OrderCache:
+    """
+    Sits in front of the broker and holds order results for the current tick. Every order it sees
+    placed, fetched or cancelled is tracked until it closes, and refresh() - called once at the
+    start of each tick - pulls all of the open ones in a single get_orders() call if the broker
+    has one. After that, get_order() is a dict lookup however many times states ask for an order.
+    Orders can be parked eg. by a TriggerIndex, when whoever placed them won't look at them until
+    price has moved. Parked orders are left out of refresh(), and are fetched one at a time if
+    they're asked for.
+
+    Placing and cancelling orders still go straight to the broker. What they return isn't cached:
+    a broker may only settle fills against the current bar when the order is next fetched, so the
+    first get_order() after an order is placed or cancelled goes to the broker, and what that
+    returns is cached for the rest of the tick. Orders fetched by refresh() can't change until
+    the next tick, since nothing else touches them at the broker in between. Anything else is
+    passed through untouched
+    """
+
+    broker: ITradeAPI
+    time_manager: ITimeManager
+    _orders: dict[str, IOrderResult]
+    _open: dict[str, None]
+    _parked: dict[str, None]
+
+    def __init__(self, broker: ITradeAPI, time_manager: ITimeManager) -> None:
+        self.broker = broker
+        self.time_manager = time_manager
+        self._orders = dict()
+        # dict rather than set so that refreshes go out in the order the orders were placed
+        self._open = dict()
+        self._parked = dict()
+        self._cached_at = None
+
+    def __getattr__(self, name):
+        return getattr(self.broker, name)
+
+    def refresh(self) -> None:
+        self._orders = dict()
+        self._cached_at = self.time_manager.now
+        if not self._open:
+            return
+
+        order_ids = list(self._open)
+        if hasattr(self.broker, "get_orders"):
+            orders = self.broker.get_orders(order_ids)
+        else:
+            orders = [self.broker.get_order(order_id) for order_id in order_ids]
+
+        for order in orders:
+            self._store(order)
+
+    def get_order(self, order_id: str) -> IOrderResult:
+        self._check_tick()
+        order = self._orders.get(order_id)
+        if order is None:
+            order = self._store(self.broker.get_order(order_id))
+        return order
+
+    def cancel_order(self, order_id: str) -> IOrderResult:
+        self._check_tick()
+        return self._track(self.broker.cancel_order(order_id))
+
+    def buy_order_limit(self, *args, **kwargs) -> IOrderResult:
+        self._check_tick()
+        return self._track(self.broker.buy_order_limit(*args, **kwargs))
+
+    def buy_order_market(self, *args, **kwargs) -> IOrderResult:
+        self._check_tick()
+        return self._track(self.broker.buy_order_market(*args, **kwargs))
+
+    def sell_order_limit(self, *args, **kwargs) -> IOrderResult:
+        self._check_tick()
+        return self._track(self.broker.sell_order_limit(*args, **kwargs))
+
+    def sell_order_market(self, *args, **kwargs) -> IOrderResult:
+        self._check_tick()
+        return self._track(self.broker.sell_order_market(*args, **kwargs))
+
+    def park(self, order_id: str) -> None:
+        # only an order that's still being tracked - a closed one has nothing to refresh anyway
+        if order_id in self._open:
+            del self._open[order_id]
+            self._parked[order_id] = None
+
+    def unpark(self, order_id: str) -> None:
+        if order_id in self._parked:
+            del self._parked[order_id]
+            self._open[order_id] = None
+
+    def _check_tick(self) -> None:
+        # in case something asks between the tick and refresh(), or refresh() is never called
+        if self._cached_at != self.time_manager.now:
+            self._orders = dict()
+            self._cached_at = self.time_manager.now
+
+    def _store(self, order: IOrderResult) -> IOrderResult:
+        self._orders[order.order_id] = order
+        return self._track(order)
+
+    def _track(self, order: IOrderResult) -> IOrderResult:
+        # an order that's just been placed or cancelled is only tracked - anything cached for it
+        # from earlier in the tick is out of date, and the next get_order() fetches it again
+        if self._orders.get(order.order_id) is not order:
+            self._orders.pop(order.order_id, None)
+        if order.closed:
+            self._open.pop(order.order_id, None)
+            self._parked.pop(order.order_id, None)
+        elif order.order_id not in self._parked:
+            self._open[order.order_id] = None
+        return order
@@ -0,0 +1,71 @@
+from broker_api import IOrderResult
+
+
+class OrderLedger:
+    """
+    Running totals over an Instance's sales orders, so that units sold, sell value and the filled
+    order count are plain reads instead of a rescan of every order. Instance calls record() each
+    time a new result for one of its orders comes back from the broker - that order's previous
+    contribution is swapped out for the new one.
+
+    Fills are added to the totals as they come back, so the totals are summed in fill order - only
+    a change to an order that had already filled sums them again, in the order the orders were
+    first recorded. Either way the float totals can differ in the last bits from looping over them
+    """
+
+    __slots__ = ("orders", "filled_orders", "filled_units", "filled_value", "_contributions")
+
+    orders: dict[str, IOrderResult]
+    filled_orders: dict[str, IOrderResult]
+    filled_units: float
+    filled_value: float
+    _contributions: dict[str, tuple[float, float]]
+
+    def __init__(self) -> None:
+        self.orders = dict()
+        self.filled_orders = dict()
+        # units from orders that are completely filled
+        self.filled_units = 0
+        # value of anything that has filled, including partial fills on open or cancelled orders
+        self.filled_value = 0
+        self._contributions = dict()
+
+    def __len__(self) -> int:
+        return len(self.orders)
+
+    @property
+    def filled_count(self) -> int:
+        return len(self.filled_orders)
+
+    def record(self, order: IOrderResult) -> None:
+        order_id = order.order_id
+        self.orders[order_id] = order
+
+        filled = order.status_summary == "filled"
+        if filled:
+            self.filled_orders[order_id] = order
+        else:
+            self.filled_orders.pop(order_id, None)
+
+        units = order.filled_unit_quantity if filled else 0
+        value = order.filled_total_value if order.filled_total_value else 0
+
+        previous = self._contributions.get(order_id, (0, 0))
+        self._contributions[order_id] = (units, value)
+        if previous == (units, value):
+            return
+
+        if previous == (0, 0):
+            # usual case - an order filling for the first time
+            self.filled_units += units
+            self.filled_value += value
+        else:
+            # an order that had already (part) filled has changed, eg. a partial fill progressing
+            self._resum()
+
+    def _resum(self) -> None:
+        self.filled_units = 0
+        self.filled_value = 0
+        for units, value in self._contributions.values():
+            self.filled_units += units
+            self.filled_value += value
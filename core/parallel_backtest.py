@@ -0,0 +1,153 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable
+from parameter_store import IParameterStore
+import uuid
+
+from .play_library import PlayLibrary
+from .play_orchestrator import PlayOrchestrator, emit_play_start
+from .strategy_handler import StrategyHandler
+from .constants import RT_BACKTEST
+from .telemetry import ITelemetry, SqsBatched
+from .log_sinks import configure_logging, SINK_NULL
+from .ta_cache import TACache
+
+import logging
+
+log = logging.getLogger(__name__)
+
+SHARD_CATEGORY = "category"
+SHARD_SYMBOL = "symbol"
+
+
+def _run_shard(
+    store_factory: Callable[[], IParameterStore],
+    strategy_handler: StrategyHandler,
+    run_id: str,
+    shard: dict[str, set[str]],
+    log_sink: str,
+    ta_cache: TACache,
+) -> list[dict]:
+    # runs in the worker process - gets its own store, SymbolData, BackTestAPI and time manager.
+    # the worker's process is this back test's to set up, quiet like any other back test
+    configure_logging(quiet=True, sink=log_sink)
+    po = PlayOrchestrator(
+        store=store_factory(),
+        strategy_handler=strategy_handler,
+        run_type=RT_BACKTEST,
+        shard=shard,
+        run_id=run_id,
+        ta_cache=ta_cache,
+        emit_start=False,
+    )
+    po.start()
+
+    while not po.eof:
+        po.run()
+
+    po.shutdown()
+    log.info(f"Shard {shard} of run {run_id} finished at {po.now}")
+    return po.get_instance_summaries()
+
+
+class ParallelBacktest:
+    """
+    Splits a back test across processes. CategoryHandlers share no instances or orders, so each
+    symbol category (or category x symbol when shard_by is SHARD_SYMBOL) can be run by a separate
+    PlayOrchestrator in its own process, and the instance summaries merged afterwards.
+
+    store_factory is called in each worker to create its parameter store, so it needs to be
+    picklable eg. functools.partial(S3, "mfers-tabot"). Workers log to the null sink unless told
+    otherwise, so they don't need AWS credentials for logging. Every worker's orchestrator gets
+    this back test's id, so their telemetry is reported under the one PlayOrchestrator-<id> run.
+    That run's Play start event is emitted once by run(), for the whole library, rather than by
+    each worker for its own shard
+    """
+
+    store_factory: Callable[[], IParameterStore]
+    strategy_handler: StrategyHandler
+    shard_by: str
+    max_workers: int
+    log_sink: str
+    ta_cache: TACache
+    telemetry: ITelemetry
+    id: str
+    results: list[dict]
+
+    def __init__(
+        self,
+        store_factory: Callable[[], IParameterStore],
+        strategy_handler: StrategyHandler,
+        shard_by: str = SHARD_CATEGORY,
+        max_workers: int = None,
+        log_sink: str = SINK_NULL,
+        ta_cache: TACache = None,
+        telemetry: ITelemetry = None,
+    ) -> None:
+        if shard_by not in (SHARD_CATEGORY, SHARD_SYMBOL):
+            raise ValueError(f"Unknown shard_by '{shard_by}'")
+
+        self.store_factory = store_factory
+        self.strategy_handler = strategy_handler
+        self.shard_by = shard_by
+        self.max_workers = max_workers
+        self.log_sink = log_sink
+        self.ta_cache = ta_cache
+        self.telemetry = telemetry
+        self.id = uuid.uuid4().hex[:6].upper()
+        self.results = []
+
+    def _library(self) -> PlayLibrary:
+        return PlayLibrary(store=self.store_factory(), strategy_handler=self.strategy_handler)
+
+    def shards(self, library: PlayLibrary = None) -> list[dict[str, set[str]]]:
+        if library is None:
+            library = self._library()
+
+        shards = []
+        for cat, symbols in library.symbol_categories.items():
+            if self.shard_by == SHARD_CATEGORY:
+                shards.append({cat: None})
+            else:
+                for s in symbols:
+                    shards.append({cat: {s}})
+
+        return shards
+
+    def run(self) -> list[dict]:
+        library = self._library()
+        shards = self.shards(library)
+        log.info(f"Running {str(self)} as {len(shards)} shards")
+
+        # workers report under PlayOrchestrator-<id>, so the run is started under that name too
+        telemetry = self.telemetry
+        if telemetry is None:
+            telemetry = SqsBatched(self.store_factory(), RT_BACKTEST)
+        emit_play_start(telemetry, f"PlayOrchestrator-{self.id}", RT_BACKTEST, library)
+        if self.telemetry:
+            telemetry.flush()
+        else:
+            telemetry.close()
+
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [
+                executor.submit(
+                    _run_shard,
+                    self.store_factory,
+                    self.strategy_handler,
+                    self.id,
+                    shard,
+                    self.log_sink,
+                    self.ta_cache,
+                )
+                for shard in shards
+            ]
+
+            results = []
+            for f in futures:
+                results += f.result()
+
+        self.results = results
+        return results
+
+    def __str__(self) -> str:
+        return f"ParallelBacktest-{self.id}"
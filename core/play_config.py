@@ -72,6 +72,12 @@ class PlayConfig:
         self.state_terminated = self._state_str_to_object(state_terminated)
         self.config_object = self._state_str_to_object(config_object)
 
+    @property
+    def entry_signal_key(self):
+        # configs with equal keys get the same answer from their waiting state, for the same symbol
+        # at the same time, so the answer can be shared - see EntrySignalBoard. None never shares
+        return None
+
     def _state_str_to_object(self, state_str):
 
         if state_str in self.strategy_handler:
@@ -19,11 +19,15 @@ class PlayLibrary:
         store: IParameterStore,
         strategy_handler: StrategyHandler,
         store_path: str = "/tabot/play_library/paper",
+        shard: dict[str, set[str]] = None,
     ):
+        # shard limits the library to a subset of categories, and optionally a subset of each category's symbols
+        # (None means all of them). Used to split a back test across worker processes
         self.algos = set()
         self.store = store
         self.strategy_handler = strategy_handler
         self._store_path = store_path
+        self._shard = shard
         category_set = self._get_categories()
 
         self.symbol_categories = self._enumerate_symbols(symbol_categories=category_set)
@@ -34,7 +38,10 @@ class PlayLibrary:
 
     def _get_categories(self) -> set:
         path = f"{self._store_path}/symbol_categories"
-        return set(json.loads(self.store.get(path)))
+        categories = set(json.loads(self.store.get(path)))
+        if self._shard is not None:
+            categories &= set(self._shard)
+        return categories
 
     def _get_market_conditions(self) -> set:
         path = f"{self._store_path}/market_conditions"
@@ -46,6 +53,8 @@ class PlayLibrary:
             cat_sym_map[cat] = set(
                 json.loads(self.store.get(f"{self._store_path}/{cat}/symbols"))
             )
+            if self._shard is not None and self._shard[cat] is not None:
+                cat_sym_map[cat] &= set(self._shard[cat])
         return cat_sym_map
 
     def _unique_symbols(self, symbol_categories: dict[str, set[str]]):
@@ -1,25 +1,73 @@
 from parameter_store import IParameterStore
-from broker_api import BackTestAPI
 from symbol import Symbol
+from typing import Callable
 import pandas as pd
 import uuid
 from datetime import datetime
 
 from .time_manager import BackTestTimeManager, ITimeManager
+from .order_cache import OrderCache, BackTestBulkAPI
+from .ta_cache import TACache
 from .play_library import PlayLibrary
+from .play_config import PlayConfig
 from .symbol_data import SymbolData
 from .weather import IWeatherReader, StubWeather, WeatherResult
 from .category_handler import CategoryHandler
+from .config_totals import ConfigTotals
 from .symbol_play import SymbolPlay
 from .strategy_handler import StrategyHandler
 from .constants import RT_BACKTEST, RT_PAPER, RT_REAL, RT_DICT
-from .telemetry import ITelemetry, Sqs
+from .telemetry import ITelemetry, SqsBatched
 
 import logging
 
 log = logging.getLogger(__name__)
 
 
+def emit_play_start(
+    telemetry: ITelemetry, play_id: str, run_type: int, play_library: PlayLibrary
+) -> None:
+    # once per run - play_id is the key of the run's row once it's been loaded from the queue
+    telemetry.emit(
+        event="Play start",
+        play_id=play_id,
+        run_type=RT_DICT[run_type],
+        start_time_utc=str(datetime.utcnow()),
+        start_time_local=str(datetime.astimezone(datetime.now())),
+        play_library_symbol_categories={
+            key: list(val) for (key, val) in play_library.symbol_categories.items()
+        },
+        play_library_conditions=list(play_library.market_conditions),
+        # play_library=self.play_library.json_encode(),
+    )
+
+
+class PlayStretch:
+    """
+    A run of ticks that one symbol category spent on one market condition's plays, from the
+    CategoryHandler being started to it being stopped when the weather changed. start and end are
+    the first and last ticks its plays ran on. A stretch that's still going has no end, one that
+    ran to the end of the back test is never stopped, and one stopped before its plays ever ran
+    has neither a start nor an end
+    """
+
+    category: str
+    condition: str
+    start: pd.Timestamp
+    end: pd.Timestamp
+    stopped: pd.Timestamp
+
+    def __init__(self, category: str, condition: str) -> None:
+        self.category = category
+        self.condition = condition
+        self.start = None
+        self.end = None
+        self.stopped = None
+
+    def __repr__(self) -> str:
+        return f"PlayStretch {self.category} {self.condition} {self.start} to {self.end}"
+
+
 class PlayOrchestrator:
     """
     Startup responsibilities:
@@ -36,9 +84,8 @@ class PlayOrchestrator:
         TimeManger tick
         Checks weather - has it changed?
         If weather has changed:
-            Tell PlayHandler to shut down
-        Else:
-            Tell PlayHandler to run
+            Tell PlayHandler to shut down and start a new one for the new weather
+        Run every active SymbolPlay
 
     Shutdown responsibilities:
         Tell PlayHandler to shut down
@@ -53,6 +100,8 @@ class PlayOrchestrator:
     weather: IWeatherReader
     _active_category_handlers: dict[str, CategoryHandler]
     _inactive_category_handlers: set
+    _dispatch: list[SymbolPlay]
+    _stretches: list[PlayStretch]
     run_type: int
     id: str
 
@@ -61,18 +110,37 @@ class PlayOrchestrator:
         store: IParameterStore,
         strategy_handler: StrategyHandler,
         run_type: int = RT_BACKTEST,
+        shard: dict[str, set[str]] = None,
+        run_id: str = None,
+        play_library: PlayLibrary = None,
+        telemetry: ITelemetry = None,
+        ta_cache: TACache = None,
+        symbol_factory: Callable[[str, ITimeManager], Symbol] = None,
+        weather_factory: Callable[..., IWeatherReader] = None,
+        emit_start: bool = True,
     ) -> None:
         # init stuff
         self._active_category_handlers = dict()
         self._inactive_category_handlers = set()
-        self.id = self._generate_id()
+        self._dispatch = None
+        self._stretches = []
+        # handlers started since the last tick - their plays first run on the next one
+        self._unstarted = []
+        self._last_tick = None
+        # run_id lets several orchestrators (eg parallel back test workers) report under the one run
+        self.id = run_id if run_id else self._generate_id()
         self.store = store
         self.strategy_handler = strategy_handler
         self.run_type = run_type
-        self.telemetry = Sqs(store, run_type)
+        self.telemetry = telemetry if telemetry else SqsBatched(store, run_type)
 
-        # set up play library from store
-        self.play_library = PlayLibrary(store=store, strategy_handler=strategy_handler)
+        # set up play library from store, unless one has already been built eg. by a parameter sweep
+        if play_library:
+            self.play_library = play_library
+        else:
+            self.play_library = PlayLibrary(
+                store=store, strategy_handler=strategy_handler, shard=shard
+            )
 
         # set up time manager
         tm = self._get_time_manager(run_type)
@@ -80,35 +148,43 @@ class PlayOrchestrator:
 
         # set up symbol data
         self.symbol_data = SymbolData(
-            self.play_library.unique_symbols, self.play_library.algos, self.time_manager
+            self.play_library.unique_symbols,
+            self.play_library.algos,
+            self.time_manager,
+            ta_cache=ta_cache,
+            symbol_factory=symbol_factory,
         )
 
         # register symbols into time manager, so it knows the horizon
         self.time_manager.add_symbols(self.symbol_data.unique_symbols)
 
-        # set up API
-        self.broker = BackTestAPI(
+        # set up API. order results are cached per tick, see run()
+        self.broker = OrderCache(
+            broker=BackTestBulkAPI(
+                time_manager=self.time_manager,
+                symbol_objects=self.symbol_data.unique_symbols,
+            ),
             time_manager=self.time_manager,
-            symbol_objects=self.symbol_data.unique_symbols,
         )
 
-        # set up weather
-        self.weather = StubWeather(self.time_manager)
+        # set up weather. a factory gets the symbols of each category and the market conditions
+        # there are plays for, eg. MarketRegimeWeather
+        if weather_factory:
+            self.weather = weather_factory(
+                tm=self.time_manager,
+                symbols={
+                    cat: self.get_category_symbols(cat) for cat in self.play_library.symbol_categories
+                },
+                market_conditions=self.play_library.market_conditions,
+            )
+        else:
+            self.weather = StubWeather(self.time_manager)
         self._last_weather = self.weather.get_all()
 
-        self.telemetry.emit(
-            event="Play start",
-            play_id=str(self),
-            run_type=RT_DICT[run_type],
-            start_time_utc=str(datetime.utcnow()),
-            start_time_local=str(datetime.astimezone(datetime.now())),
-            play_library_symbol_categories={
-                key: list(val)
-                for (key, val) in self.play_library.symbol_categories.items()
-            },
-            play_library_conditions=list(self.play_library.market_conditions),
-            # play_library=self.play_library.json_encode(),
-        )
+        # not when this is one part of a bigger run eg. a ParallelBacktest shard, which has
+        # already been started for the whole library
+        if emit_start:
+            emit_play_start(self.telemetry, str(self), run_type, self.play_library)
 
     def _generate_id(self, length: int = 6):
         return uuid.uuid4().hex[:length].upper()
@@ -122,15 +198,42 @@ class PlayOrchestrator:
 
     def start(self):
         self.time_manager.start()
+        self.symbol_data.sync_windows()
         self._last_weather = self.weather.get_all()
         for cat in self.play_library.symbol_categories:
             w = self._last_weather[cat].condition
             self.start_handler(cat, w)
 
-    def _get_plays(self, category, weather):
-        return self.play_library.library[category][weather]
-
-    def _get_symbol_obj(self, cat: str) -> dict[str, Symbol]:
+    def shutdown(self):
+        # make sure buffered telemetry gets delivered before the process goes away
+        self.telemetry.close()
+
+    def get_instance_summaries(self) -> list[dict]:
+        summaries = []
+        handlers = list(self._active_category_handlers.values())
+        handlers += list(self._inactive_category_handlers)
+        for h in handlers:
+            summaries += h.get_instance_summaries()
+        return summaries
+
+    def get_config_totals(self) -> list[ConfigTotals]:
+        # every play config that's been run, best total gain first. a category that's been handed
+        # back the same play config after a change in weather has it totalled across both handlers
+        totals = dict()
+        handlers = list(self._active_category_handlers.values())
+        handlers += list(self._inactive_category_handlers)
+        for h in handlers:
+            for t in h.get_config_totals():
+                if t.config not in totals:
+                    totals[t.config] = ConfigTotals(t.config)
+                totals[t.config].merge(t)
+
+        return sorted(totals.values(), key=lambda t: t.total_gain, reverse=True)
+
+    def get_plays(self, category: str, condition: str) -> list[PlayConfig]:
+        return self.play_library.library[category][condition]
+
+    def get_category_symbols(self, cat: str) -> dict[str, Symbol]:
         cat_symbols_str = self.play_library.symbol_categories[cat]
 
         cat_symbols_obj = dict()
@@ -144,13 +247,15 @@ class PlayOrchestrator:
         TimeManger tick
         Checks weather - has it changed?
         If weather has changed:
-            Tell PlayHandler to shut down
-        Else:
-            Tell PlayHandler to run
+            Tell PlayHandler to shut down and start a new one for the new weather
+        Run every active SymbolPlay
     """
 
     def run(self):
         self.time_manager.tick()
+        self.symbol_data.sync_windows()
+        # one bulk fetch of every open order, then states read them from the cache
+        self.broker.refresh()
         new_weather = self.weather.get_all()
 
         for cat in self.play_library.symbol_categories:
@@ -160,15 +265,30 @@ class PlayOrchestrator:
                 # weather has changed
                 log.info(f"Weather for {cat} has changed (was: {last_w}, now: {new_w})")
                 self.stop_handler(category=cat)
-                this_handler = self.start_handler(category=cat, condition=new_w)
+                self.start_handler(category=cat, condition=new_w)
+
+        # every active play of every category in one list, only rebuilt when a handler or play
+        # starts or stops rather than walking the handlers each tick
+        if self._dispatch is None:
+            self._dispatch = [
+                c
+                for cat in self.play_library.symbol_categories
+                for c in self.get_active_handler(cat).active_symbol_plays
+            ]
 
-            else:
-                # weather has not changed
-                this_handler = self.get_active_handler(category=cat)
+        if self._unstarted:
+            for s in self._unstarted:
+                s.start = self.time_manager.now
+            self._unstarted = []
 
-            this_handler.run()
+        for c in self._dispatch:
+            c.run()
 
         self._last_weather = new_weather
+        self._last_tick = self.time_manager.now
+
+    def _invalidate_dispatch(self, *args) -> None:
+        self._dispatch = None
 
     def get_active_handler(self, category: str) -> CategoryHandler:
         if category not in self.play_library.library:
@@ -207,8 +327,8 @@ class PlayOrchestrator:
                 f"Cannot find market condition named '{condition}'"
             )
 
-        cat_symbols_obj = self._get_symbol_obj(category)
-        plays = self._get_plays(category, condition)
+        cat_symbols_obj = self.get_category_symbols(category)
+        plays = self.get_plays(category, condition)
 
         new_handler = CategoryHandler(
             symbols=cat_symbols_obj,
@@ -217,9 +337,17 @@ class PlayOrchestrator:
             time_manager=self.time_manager,
             run_id=self.__str__(),
             telemetry=self.telemetry,
+            bar_windows=self.symbol_data.bar_windows,
+            signal_caches=self.symbol_data.signal_caches,
+            on_active_changed=self._invalidate_dispatch,
         )
         new_handler.start()
         self._active_category_handlers[category] = new_handler
+        self._invalidate_dispatch()
+
+        stretch = PlayStretch(category, condition)
+        self._stretches.append(stretch)
+        self._unstarted.append(stretch)
         return new_handler
 
     def stop_handler(self, category: str) -> bool:
@@ -236,12 +364,28 @@ class PlayOrchestrator:
             handler.stop()
             self._inactive_category_handlers.add(handler)
             del self._active_category_handlers[category]
+            self._invalidate_dispatch()
+            self._end_stretch(category)
 
             return True
 
         except Exception as e:
             raise
 
+    def _end_stretch(self, category: str) -> None:
+        stretch = next(s for s in reversed(self._stretches) if s.category == category)
+        if stretch in self._unstarted:
+            # stopped before its plays ever ran, but stopping still terminates their instances
+            self._unstarted.remove(stretch)
+        else:
+            stretch.end = self._last_tick
+        stretch.stopped = self.time_manager.now
+
+    @property
+    def stretches(self) -> list[PlayStretch]:
+        # every category x condition this has run plays for, in the order they were started
+        return list(self._stretches)
+
     # TODO property for running plays
     @property
     def first_record(self) -> pd.Timestamp:
@@ -261,9 +405,7 @@ class PlayOrchestrator:
 
     @property
     def eof(self) -> bool:
-        if self.now == self.last_record:
-            return True
-        return False
+        return self.time_manager.eof
 
     def sleep(self) -> None:
         if self.run_type == RT_BACKTEST:
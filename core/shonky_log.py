@@ -5,7 +5,14 @@ log = logging.getLogger(__name__)
 # there is 10000% a better way to do this but python's logging module is a warcrime
 # lord forgive me
 # this whole thing is just so that I don't have to repeatedly specify variables to output as json into the logs
+#
+# every call checks whether the level is enabled before doing anything else, so disabled calls are
+# close to free. messages and named extras can be passed as callables (eg. lambda: f"..." or
+# order.as_dict without the brackets) so that they only get built if the record is going out
 class ShonkyLog:
+    # anything below this is dropped before the logger is even asked. see set_quiet()
+    quiet_level: int = logging.NOTSET
+
     class Decorators:
         @classmethod
         def sort(cls, unsorted_dict: dict):
@@ -13,39 +20,51 @@ class ShonkyLog:
             return sorted_dict
 
         @classmethod
-        def prepare_extras(cls, decorated):
-            def inner(*args, **kwargs):
-                extra_dict = {}
-
-                for k, v in kwargs.items():
-                    extra_dict[k] = ShonkyLog.Decorators.sort(v)
+        def resolve(cls, value):
+            return value() if callable(value) else value
 
-                if len(args) > 2:
-                    extra_dict["other_values"] = []
+        @classmethod
+        def build_extras(cls, extras: tuple, named_extras: dict):
+            extra_dict = {}
 
-                for e in args[2:]:
-                    extra_dict["other_values"].append(e)
+            for k, v in named_extras.items():
+                extra_dict[k] = ShonkyLog.Decorators.sort(
+                    ShonkyLog.Decorators.resolve(v)
+                )
 
-                return decorated(args[0], message=args[1], _extras=extra_dict)
+            if len(extras) > 0:
+                extra_dict["other_values"] = list(extras)
 
-            return inner
+            return extra_dict
 
         @classmethod
-        def prepare_extras_log(cls, decorated):
-            def inner(*args, **kwargs):
-                extra_dict = {}
+        def prepare_extras(cls, level: int):
+            def decorator(decorated):
+                def inner(self, message, *extras, **named_extras):
+                    if not self.is_enabled_for(level):
+                        return
 
-                for k, v in kwargs.items():
-                    extra_dict[k] = ShonkyLog.Decorators.sort(v)
+                    return decorated(
+                        self,
+                        message=ShonkyLog.Decorators.resolve(message),
+                        _extras=ShonkyLog.Decorators.build_extras(extras, named_extras),
+                    )
 
-                if len(args) > 3:
-                    extra_dict["other_values"] = []
+                return inner
 
-                for e in args[3:]:
-                    extra_dict["other_values"].append(e)
+            return decorator
+
+        @classmethod
+        def prepare_extras_log(cls, decorated):
+            def inner(self, level, message, *extras, **named_extras):
+                if not self.is_enabled_for(level):
+                    return
 
                 return decorated(
-                    args[0], level=args[1], message=args[2], _extras=extra_dict
+                    self,
+                    level=level,
+                    message=ShonkyLog.Decorators.resolve(message),
+                    _extras=ShonkyLog.Decorators.build_extras(extras, named_extras),
                 )
 
             return inner
@@ -53,6 +72,14 @@ class ShonkyLog:
     def __init__(self, log: logging.Logger):
         self._log = log
 
+    @classmethod
+    def set_quiet(cls, quiet: bool = True, level: int = logging.ERROR):
+        # back test quiet mode - calls below level return straight away, whatever the loggers say
+        cls.quiet_level = level if quiet else logging.NOTSET
+
+    def is_enabled_for(self, level: int) -> bool:
+        return level >= ShonkyLog.quiet_level and self._log.isEnabledFor(level)
+
     @Decorators.prepare_extras_log
     def log(
         self,
@@ -64,26 +91,26 @@ class ShonkyLog:
     ):
         self._log.log(level, message, extra=_extras)
 
-    @Decorators.prepare_extras
+    @Decorators.prepare_extras(logging.DEBUG)
     def debug(self, message, *extras, **named_extras):
         self._log.debug(message, extra=extras)
 
-    @Decorators.prepare_extras
+    @Decorators.prepare_extras(logging.INFO)
     def info(self, message, _extras=None, *extras, **named_extras):
         self._log.info(message, extra=_extras)
 
-    @Decorators.prepare_extras
+    @Decorators.prepare_extras(logging.WARNING)
     def warning(self, message, _extras=None, *extras, **named_extras):
         self._log.warning(message, extra=extras)
 
-    @Decorators.prepare_extras
+    @Decorators.prepare_extras(logging.ERROR)
     def error(self, message, _extras=None, *extras, **named_extras):
         self._log.error(message, extra=extras)
 
-    @Decorators.prepare_extras
+    @Decorators.prepare_extras(logging.CRITICAL)
     def critical(self, message, _extras=None, *extras, **named_extras):
         self._log.critical(message, extra=extras)
 
-    @Decorators.prepare_extras
+    @Decorators.prepare_extras(logging.ERROR)
     def exception(self, message, _extras=None, *extras, **named_extras):
         self._log.exception(message, extra=extras)
@@ -3,7 +3,7 @@ from symbol import Symbol, SymbolData
 
 # from .symbol_data import SymbolData
 from .play_config import PlayConfig
-from broker_api import ITradeAPI
+from .bar_window import BarWindow
 import logging
 
 
@@ -15,43 +15,63 @@ class State(ABC):
     STATE_SPLIT = 1
     STATE_MOVE = 2
 
-    symbol: Symbol
-    symbol_str: str
-    ohlc: SymbolData
-    config: PlayConfig
-    broker: ITradeAPI
-    log: logging.Logger
+    # states are created on every transition of every instance, so they hold nothing but their
+    # links - everything else is read through from the parent instance rather than copied
+    __slots__ = ("previous_state", "parent_instance")
 
     @abstractmethod
     def __init__(self, previous_state, parent_instance=None) -> None:
         self.previous_state = previous_state
         if not parent_instance:
             self.parent_instance = previous_state.parent_instance
-            config_source = previous_state
         else:
             self.parent_instance = parent_instance
-            config_source = parent_instance
-
-        self.symbol = config_source.symbol
-        self.symbol_str = config_source.symbol_str
-        self.ohlc = config_source.symbol.ohlc
-        self.config = config_source.config
-        self.controller = self.parent_instance.parent_controller
-        self.log = self.parent_instance.log
 
         # self.log.debug(f"Started {self.__repr__()} at {self.symbol.time_manager.now()}")
 
+    @property
+    def symbol(self) -> Symbol:
+        return self.parent_instance.symbol
+
+    @property
+    def symbol_str(self) -> str:
+        return self.parent_instance.symbol_str
+
+    @property
+    def ohlc(self) -> SymbolData:
+        return self.parent_instance.ohlc
+
+    @property
+    def bars(self) -> BarWindow:
+        return self.parent_instance.bars
+
+    @property
+    def signal_cache(self) -> dict:
+        return self.parent_instance.signal_cache
+
+    @property
+    def config(self) -> PlayConfig:
+        return self.parent_instance.config
+
+    @property
+    def controller(self):
+        return self.parent_instance.parent_controller
+
+    @property
+    def log(self):
+        return self.parent_instance.log
+
     @abstractmethod
     def check_exit(self):
-        self.log.log(9, f"Started check_exit on {self.__repr__()}")
+        self.log.log(9, lambda: f"Started check_exit on {self.__repr__()}")
         # log.log(9, f"Started check_exit on {self.__repr__()}")
 
     def do_exit(self):
-        self.log.log(9, f"Finished do_exit on {self.__repr__()}")
+        self.log.log(9, lambda: f"Finished do_exit on {self.__repr__()}")
 
     def __del__(self):
         # use this to make sure that open orders are cancelled?
-        self.log.log(9, f"Deleting {self.__repr__()}")
+        self.log.log(9, lambda: f"Deleting {self.__repr__()}")
 
     def __repr__(self) -> str:
         return self.__class__.__name__
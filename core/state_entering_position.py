@@ -9,6 +9,7 @@ log = logging.getLogger(__name__)
 
 class StateEnteringPosition(State):
     _cls_str = "IStateEnteringPosition"
+    __slots__ = ("intervals_until_timeout",)
 
     @abstractmethod
     def __init__(self, previous_state: State, parent_instance=None, **kwargs) -> None:
@@ -32,7 +33,7 @@ class StateEnteringPosition(State):
         order_type = kwargs.get("type", None)
         if not order_type:
             order_type = self.config.buy_order_type
-            self.log.debug(f"Using default order type of {self.config.buy_order_type}")
+            self.log.debug(lambda: f"Using default order type of {self.config.buy_order_type}")
             log_extras["buy_order_overridden"] = False
 
         # boolean checks to see if we need to generate a limit price
@@ -40,11 +41,10 @@ class StateEnteringPosition(State):
         generate_limit = not limit_specified and order_type == "limit"
 
         if generate_limit:
-            _bars = self.ohlc.get_latest()
-            limit_price = _bars.Close
+            limit_price = self.bars.close
             aligned_limit_price = self.symbol.align_price(limit_price)
             self.log.debug(
-                f"No limit price set, using default calculated limit price of {aligned_limit_price}"
+                lambda: f"No limit price set, using default calculated limit price of {aligned_limit_price}"
             )
             log_extras["default_limit_price"] = True
 
@@ -61,12 +61,11 @@ class StateEnteringPosition(State):
 
         units = kwargs.get("units")
         if not units:
-            _bars = self.ohlc.get_latest()
-            last_price = _bars.Close
+            last_price = self.bars.close
             budget = self.config.max_play_size
             units = budget / last_price
             self.log.debug(
-                f"No units set, using default calculation. Unaligned units: {units}"
+                lambda: f"No units set, using default calculation. Unaligned units: {units}"
             )
             log_extras["default_unit_quantity"] = True
             log_extras["units_raw"] = units
@@ -76,13 +75,13 @@ class StateEnteringPosition(State):
             log_extras["units_before_notional_rounding"] = units
             units = floor(units)
             self.log.debug(
-                f"Notional units are not enabled. Rounding units down to {units}"
+                lambda: f"Notional units are not enabled. Rounding units down to {units}"
             )
 
         try:
             # can throw error for insufficient units
             aligned_units = self.symbol.align_quantity(units)
-            self.log.debug(f"Aligned units is {aligned_units}")
+            self.log.debug(lambda: f"Aligned units is {aligned_units}")
             log_extras["units_aligned"] = aligned_units
         except Exception as e:
             self.log.exception(f"Failed to align units: {str(e)}")
@@ -101,7 +100,7 @@ class StateEnteringPosition(State):
                     units=aligned_units, unit_price=aligned_limit_price
                 )
                 self.log.debug(
-                    f"Successfully submitted {order.order_type_text} for {aligned_units} units at {aligned_limit_price}"
+                    lambda: f"Successfully submitted {order.order_type_text} for {aligned_units} units at {aligned_limit_price}"
                 )
 
             except Exception as e:
@@ -114,7 +113,7 @@ class StateEnteringPosition(State):
             try:
                 order = self.parent_instance.buy_market(units=aligned_units)
                 self.log.debug(
-                    f"Successfully submitted {order.order_type_text} for {aligned_units} units"
+                    lambda: f"Successfully submitted {order.order_type_text} for {aligned_units} units"
                 )
 
             except Exception as e:
@@ -126,7 +125,7 @@ class StateEnteringPosition(State):
         # hold on to the order result object for further inspection in check_exit and do_exit
         self.intervals_until_timeout = self.config.buy_timeout_intervals
         self.log.debug(
-            f"Set buy order timeout interval of {self.config.buy_timeout_intervals} intervals"
+            lambda: f"Set buy order timeout interval of {self.config.buy_timeout_intervals} intervals"
         )
 
         log_extras["order_type"] = order.order_type_text
@@ -135,7 +134,7 @@ class StateEnteringPosition(State):
         log_extras["order_timeout"] = self.config.buy_timeout_intervals
 
         self.log.info(
-            f"Buy order submitted", state_parameters=log_extras, order=order.as_dict()
+            "Buy order submitted", state_parameters=log_extras, order=order.as_dict
         )
 
     def check_exit(self):
@@ -155,7 +154,7 @@ class StateEnteringPosition(State):
             taking_profit_state = self.controller.play_config.state_taking_profit
             log_extras = {"next_state": taking_profit_state.__name__}
             self.log.info(
-                f"Buy order filled", state_parameters=log_extras, order=order.as_dict()
+                "Buy order filled", state_parameters=log_extras, order=order.as_dict
             )
 
             return State.STATE_MOVE, taking_profit_state, {}
@@ -166,36 +165,39 @@ class StateEnteringPosition(State):
             if self.intervals_until_timeout == 0:
                 terminated_state = self.controller.play_config.state_terminated
                 self.log.info(
-                    f"{self.parent_instance}: Order ID {order_id} has timed out, moving to {terminated_state.__name__}"
+                    lambda: f"{self.parent_instance}: Order ID {order_id} has timed out, moving to {terminated_state.__name__}"
                 )
                 log_extras = {"next_state": terminated_state.__name__}
                 self.log.info(
-                    f"Buy order timed out",
+                    "Buy order timed out",
                     state_parameters=log_extras,
-                    order=order.as_dict(),
+                    order=order.as_dict,
                 )
                 return State.STATE_MOVE, terminated_state, {}
 
             else:
-                last_close = self.ohlc.get_latest().Close
+                last_close = self.bars.close
                 entry_price = order.ordered_unit_price
                 self.log.info(
-                    f"Order ID {order_id} is still in state {order.status_summary}. Last close {last_close} vs entry price {entry_price}"
+                    lambda: f"Order ID {order_id} is still in state {order.status_summary}. Last close {last_close} vs entry price {entry_price}"
                 )
-                self.log.info("Buy order still open", order=order.as_dict())
+                self.log.info("Buy order still open", order=order.as_dict)
 
                 return State.STATE_STAY, None, {}
 
         elif order.status_summary == "cancelled":
             terminated_state = self.controller.play_config.state_terminated
             log.info(
-                f"{self.parent_instance}: Order ID {order_id} has been cancelled, moving to {terminated_state.__name__}"
+                "%s: Order ID %s has been cancelled, moving to %s",
+                self.parent_instance,
+                order_id,
+                terminated_state.__name__,
             )
             log_extras = {"next_state": terminated_state.__name__}
             self.log.info(
                 "Buy order still open",
                 state_parameters=log_extras,
-                order=order.as_dict(),
+                order=order.as_dict,
             )
 
             return State.STATE_MOVE, terminated_state, {}
@@ -7,6 +7,8 @@ log = logging.getLogger(__name__)
 
 
 class StateStoppingLoss(State):
+    __slots__ = ()
+
     @abstractmethod
     # def __init__(self, parent_instance, previous_state: State) -> None:
     def __init__(self, previous_state: State, parent_instance=None) -> None:
@@ -16,6 +18,6 @@ class StateStoppingLoss(State):
         super().check_exit()
         terminated_state = self.controller.play_config.state_terminated
         self.log.debug(
-            f"{self.parent_instance}: No default clean activities, moving straight to {terminated_state.__name__}"
+            lambda: f"{self.parent_instance}: No default clean activities, moving straight to {terminated_state.__name__}"
         )
         return State.STATE_MOVE, terminated_state, {}
@@ -2,22 +2,24 @@ from .state import State
 
 
 class StateTakingProfit(State):
+    __slots__ = ()
+
     def __init__(self, previous_state: State, parent_instance=None, **kwargs) -> None:
         super().__init__(parent_instance=parent_instance, previous_state=previous_state)
 
         if kwargs.get("units_to_sell", None):
             units_to_sell = kwargs["units_to_sell"]
-            self.log.log(9, f"Finding units to sell via class {self}")
+            self.log.log(9, lambda: f"Finding units to sell via class {self}")
         else:
             units_to_sell = self._default_units_to_sell()
-            self.log.log(9, f"Finding units to sell via default base class")
+            self.log.log(9, "Finding units to sell via default base class")
 
         if kwargs.get("target_unit", None):
             target_unit = kwargs["target_unit"]
-            self.log.log(9, f"Finding unit target price to sell via class {self}")
+            self.log.log(9, lambda: f"Finding unit target price to sell via class {self}")
         else:
             target_unit = self._default_unit_price()
-            self.log.log(9, f"Finding unit price via default base class")
+            self.log.log(9, "Finding unit price via default base class")
 
         # TODO add validation - zero units, zero price, price lower than buy price
         sell_order = self.parent_instance.sell_limit(
@@ -28,7 +30,7 @@ class StateTakingProfit(State):
         self.log.info(
             "Take profit sell order submitted",
             state_parameters=log_extras,
-            order=sell_order.as_dict(),
+            order=sell_order.as_dict,
         )
 
     def _default_units_to_sell(self):
@@ -84,9 +86,9 @@ class StateTakingProfit(State):
                     "next_state": terminated_state.__name__,
                 }
                 self.log.info(
-                    f"Take profit order filled",
+                    "Take profit order filled",
                     state_parameters=log_extras,
-                    order=order.as_dict(),
+                    order=order.as_dict,
                 )
 
                 return State.STATE_MOVE, terminated_state, {}
@@ -98,9 +100,9 @@ class StateTakingProfit(State):
                 "next_state": taking_profit_state.__name__,
             }
             self.log.info(
-                f"Take profit order filled",
+                "Take profit order filled",
                 state_parameters=log_extras,
-                order=order.as_dict(),
+                order=order.as_dict,
             )
             return State.STATE_MOVE, taking_profit_state, {}
 
@@ -115,14 +117,12 @@ class StateTakingProfit(State):
             self.log.error(
                 f"Take profit order cancelled",
                 state_parameters=log_extras,
-                order=order.as_dict(),
+                order=order.as_dict,
             )
             return State.STATE_MOVE, terminated_state, {}
 
         else:
-            last_close = self.symbol.align_price(
-                self.parent_instance.ohlc.get_latest().Close
-            )
+            last_close = self.symbol.align_price(self.bars.close)
             log_extras = {
                 "held_units": self.parent_instance.units_held,
                 "next_state": None,
@@ -131,11 +131,21 @@ class StateTakingProfit(State):
 
             self.log.log(
                 9,
-                f"Take profit order still open",
+                "Take profit order still open",
                 state_parameters=log_extras,
-                order=order.as_dict(),
+                order=order.as_dict,
             )
+
+            # nothing more to do until price reaches the stop or the target, so park until then
+            if order.ordered_unit_price is not None:
+                self.controller.triggers.park(
+                    self.parent_instance,
+                    stop=self.parent_instance.stop_loss_price,
+                    target=order.ordered_unit_price,
+                    order_id=order.order_id,
+                )
             return State.STATE_STAY, None, {}
 
     def do_exit(self):
+        self.controller.triggers.discard(self.parent_instance)
         return super().do_exit()
@@ -5,7 +5,15 @@ from abc import abstractmethod
 
 class StateWaiting(State):
     _cls_str = "IStateWaiting"
+    __slots__ = ()
 
     @abstractmethod
     def __init__(self, previous_state: State, parent_instance=None) -> None:
         super().__init__(parent_instance=parent_instance, previous_state=previous_state)
+
+    def check_exit_shared(self, check_exit):
+        # for waiting states whose check_exit depends only on the symbol, now and the config's
+        # entry_signal_key - evaluated once per tick per key and shared between instances
+        return self.controller.entry_signals.evaluate(
+            self.symbol_str, self.config.entry_signal_key, check_exit
+        )
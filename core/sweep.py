@@ -0,0 +1,209 @@
+from parameter_store import IParameterStore
+from typing import Callable
+import itertools
+import pandas as pd
+
+from .play_library import PlayLibrary
+from .play_orchestrator import PlayOrchestrator
+from .strategy_handler import StrategyHandler
+from .telemetry import ITelemetry, NullTelemetry
+from .constants import RT_BACKTEST
+from .ta_cache import TACache
+
+import logging
+
+log = logging.getLogger(__name__)
+
+
+def expand_grid(defaults: dict, grid: dict[str, list]) -> list[dict]:
+    # cartesian product of the grid values, each one layered over the defaults
+    keys = list(grid.keys())
+    expanded = []
+    for this_perm in itertools.product(*grid.values()):
+        res = {keys[i]: this_perm[i] for i in range(len(keys))}
+        expanded.append(defaults | res)
+
+    return expanded
+
+
+class SweepLibrary(PlayLibrary):
+    """
+    PlayLibrary whose play configs come from a parameter grid instead of the store. Symbol
+    categories, symbols and market conditions are still read from the store. Every category x
+    condition gets the full grid, so the sweep runs every combination whatever the weather says
+    """
+
+    defaults: dict
+    grid: dict[str, list]
+    params: dict[str, dict]
+
+    def __init__(
+        self,
+        store: IParameterStore,
+        strategy_handler: StrategyHandler,
+        defaults: dict,
+        grid: dict[str, list],
+        store_path: str = "/tabot/play_library/paper",
+        shard: dict[str, set[str]] = None,
+    ):
+        self.defaults = defaults
+        self.grid = grid
+        self.params = dict()
+        super().__init__(
+            store=store,
+            strategy_handler=strategy_handler,
+            store_path=store_path,
+            shard=shard,
+        )
+
+    def _setup_library(self) -> dict:
+        configs = expand_grid(self.defaults, self.grid)
+        for n, config in enumerate(configs):
+            config["name"] = f"sweep{n:04d}"
+            self.params[config["name"]] = {k: config[k] for k in self.grid}
+
+        library = dict()
+        for cat in self.symbol_categories:
+            library[cat] = dict()
+            for condition in self.market_conditions:
+                play_configs = list()
+                for config in configs:
+                    config_object = self._resolve_str_to_object(
+                        object_string=config.get("config_object")
+                    )
+
+                    for a in config["algos"]:
+                        self.algos.add(self._resolve_str_to_object(object_string=a))
+
+                    play_configs.append(
+                        config_object(
+                            symbol_category=cat,
+                            market_condition=condition,
+                            strategy_handler=self.strategy_handler,
+                            **config,
+                        )
+                    )
+
+                library[cat][condition] = play_configs
+
+        return library
+
+
+class ParameterSweep:
+    """
+    Runs every combination of a parameter grid over one load of the bars. A PlayOrchestrator loads
+    OHLC and applies TA once per symbol, then engine, eg. MacdFastBacktest, runs every combination
+    straight over those bars - called the same way EquivalenceCheck calls it, but over the whole
+    back test. Engines for the same symbol share a signal_cache, so whatever the engine works out
+    from the bars up front is only worked out once. Every engine is created before any of them
+    runs, so a play config the engine can't run is rejected before the sweep starts.
+
+    Each category gets the play configs for the weather it starts in, and weather changes aren't
+    followed. run() returns a row per symbol category, the market condition it ran and combination,
+    indexed by those and the grid values. The generated play configs are named by combination,
+    sweep0000 and so on, so the same name turns up in every category and condition
+    """
+
+    store: IParameterStore
+    strategy_handler: StrategyHandler
+    library: SweepLibrary
+    engine: Callable
+    telemetry: ITelemetry
+    ta_cache: TACache
+    results: pd.DataFrame
+
+    def __init__(
+        self,
+        store: IParameterStore,
+        strategy_handler: StrategyHandler,
+        defaults: dict,
+        grid: dict[str, list],
+        engine: Callable,
+        telemetry: ITelemetry = None,
+        shard: dict[str, set[str]] = None,
+        ta_cache: TACache = None,
+    ) -> None:
+        self.store = store
+        self.strategy_handler = strategy_handler
+        self.engine = engine
+        self.telemetry = telemetry if telemetry else NullTelemetry()
+        self.ta_cache = ta_cache
+        self.library = SweepLibrary(
+            store=store,
+            strategy_handler=strategy_handler,
+            defaults=defaults,
+            grid=grid,
+            shard=shard,
+        )
+        self.results = None
+
+    def run(self) -> pd.DataFrame:
+        po = PlayOrchestrator(
+            store=self.store,
+            strategy_handler=self.strategy_handler,
+            run_type=RT_BACKTEST,
+            play_library=self.library,
+            telemetry=self.telemetry,
+            ta_cache=self.ta_cache,
+        )
+        log.info(f"Sweeping {len(self.library.params)} configs in {str(po)}")
+
+        # the state machine's first instances run on the first tick after the clock starts
+        po.time_manager.start()
+        start = po.time_manager.timeline[min(1, len(po.time_manager.timeline) - 1)]
+        weather = po.weather.get_all()
+
+        runs = []
+        ran = []
+        for cat in self.library.symbol_categories:
+            condition = weather[cat].condition
+            ran.append((cat, condition))
+            for symbol in po.get_category_symbols(cat).values():
+                signal_cache = po.symbol_data.signal_caches[symbol.yf_symbol]
+                for play_config in po.get_plays(cat, condition):
+                    runs.append(
+                        self.engine(
+                            symbol=symbol,
+                            play_config=play_config,
+                            run_id=str(po),
+                            start=start,
+                            end=None,
+                            signal_cache=signal_cache,
+                        )
+                    )
+
+        summaries = []
+        for r in runs:
+            summaries += r.run()
+        po.shutdown()
+
+        self.results = self._tabulate(summaries, ran)
+        return self.results
+
+    def _tabulate(self, summaries: list[dict], ran: list[tuple[str, str]]) -> pd.DataFrame:
+        keys = ["symbol_group", "weather_condition", "play_config_name"]
+        params = pd.DataFrame.from_dict(self.library.params, orient="index")
+
+        instances = pd.DataFrame(
+            summaries,
+            columns=keys + ["bought_value", "sold_value", "total_gain"],
+        )
+        instances["trades"] = instances.bought_value > 0
+        instances["wins"] = instances.total_gain > 0
+        totals = instances.groupby(keys).agg(
+            instances=("total_gain", "size"),
+            trades=("trades", "sum"),
+            wins=("wins", "sum"),
+            bought_value=("bought_value", "sum"),
+            sold_value=("sold_value", "sum"),
+            total_gain=("total_gain", "sum"),
+        )
+
+        # combinations that never terminated an instance still get a row
+        rows = pd.MultiIndex.from_tuples(
+            [(cat, condition, name) for cat, condition in ran for name in params.index],
+            names=keys,
+        )
+        results = totals.reindex(rows).fillna(0).reset_index()
+        results = results.join(params, on="play_config_name")
+        return results.set_index(keys[:2] + list(self.library.grid))
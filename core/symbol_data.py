@@ -1,29 +1,80 @@
 from symbol import Symbol
+from typing import Callable
 from core.time_manager import ITimeManager
+from core.bar_window import BarWindow
+from core.ta_pipeline import TAPipeline
+from core.ta_cache import TACache
+import pandas as pd
 import logging
 
 log = logging.getLogger(__name__)
 
 
+class SignalCache(dict):
+    """
+    Whatever strategies work out from one symbol's bars up front eg. MacdSignals. bars_version is
+    bumped by SymbolData every time it changes the symbol's bars, so anything cached here can
+    tell it's out of date without looking at the bars themselves
+    """
+
+    bars_version: int
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.bars_version = 0
+
+
 class SymbolData:
     symbols: dict[str, Symbol]
     unique_symbols: set[Symbol]
     _ta_algos: set
+    _ta_applied: set
+    _ta_streams: dict
+    _ta_index: dict[str, pd.Index]
+    bar_windows: dict[str, BarWindow]
+    signal_caches: dict[str, SignalCache]
     time_manager: ITimeManager
 
-    def __init__(self, symbols: set[str], algos: set, time_manager: ITimeManager):
+    def __init__(
+        self,
+        symbols: set[str],
+        algos: set,
+        time_manager: ITimeManager,
+        ta_workers: int = None,
+        ta_cache: TACache = None,
+        symbol_factory: Callable[[str, ITimeManager], Symbol] = None,
+    ):
         self.symbols = dict()
         self._ta_algos = set()
+        self._ta_applied = set()
+        self._ta_workers = ta_workers
+        self._ta_cache = ta_cache
+        self._ta_streams = dict()
+        # per symbol, the bars index TA was last worked out over - anything after it is new
+        self._ta_index = dict()
+        self.bar_windows = dict()
+        # per symbol, for whatever strategies work out from the bars up front eg. MacdSignals. kept
+        # here rather than on the strategy's class so that it goes when these bars do
+        self.signal_caches = dict()
         self.time_manager = time_manager
+        # eg. to back test over bars that are already in memory, see FrameSymbol
+        self._symbol_factory = symbol_factory
 
         # self._back_testing = back_testing
 
         for s in symbols:
             s_obj = self._instantiate_symbol(s)
             self.symbols[s] = s_obj
+            self.signal_caches[s] = SignalCache()
 
+        # collect every algo first, then apply them all in one pass
         for a in algos:
-            self.register_ta(a)
+            self.register_ta(a, apply=False)
+        self._apply_ta()
+
+        # after TA so that the windows pick up the TA columns too
+        for s_str, s_obj in self.symbols.items():
+            self.bar_windows[s_str] = BarWindow.from_bars(s_obj.ohlc.bars)
 
     def _instantiate_symbol(self, symbol: str) -> bool:
         if symbol in self.symbols:
@@ -32,19 +83,76 @@ class SymbolData:
             )
             return
 
+        if self._symbol_factory:
+            return self._symbol_factory(symbol, self.time_manager)
+
         s = Symbol(yf_symbol=symbol, time_manager=self.time_manager)
 
         return s
 
-    def register_ta(self, ta_algo):
+    def register_ta(self, ta_algo, apply: bool = True):
         self._ta_algos.add(ta_algo)
-        self._apply_ta()
+        if apply:
+            self._apply_ta()
 
     def _apply_ta(self):
+        # only the algos that haven't been applied yet, in dependency order
+        pending = self._ta_algos - self._ta_applied
+        available = {c for a in self._ta_applied for c in a.outputs}
+        TAPipeline(
+            pending,
+            max_workers=self._ta_workers,
+            available_columns=available,
+            cache=self._ta_cache,
+        ).apply(self.symbols)
+        self._ta_applied |= pending
+        for s_str, s_obj in self.symbols.items():
+            self._ta_index[s_str] = s_obj.ohlc.bars.index
+            self.signal_caches[s_str].bars_version += 1
+
+    def sync_windows(self) -> None:
+        # called once per tick, after the time manager has moved
+        now = self.time_manager.now
+        for s_str, s_obj in self.symbols.items():
+            if s_obj.ohlc.bars.index is not self._ta_index[s_str]:
+                self._ta_new_bars(s_str)
+            self.bar_windows[s_str].sync(s_obj.ohlc.bars, now)
+
+    def _ta_new_bars(self, symbol: str) -> None:
+        # paper/live symbols have bars appended to them as they come in. Work out TA for just the
+        # new ones, unless an algo can't stream in which case it's all worked out again
+        s_obj = self.symbols[symbol]
+        bars = s_obj.ohlc.bars
+        done = self._ta_index[symbol]
+        new = bars.index if len(done) == 0 else bars.index[bars.index > done[-1]]
+        try:
+            for timestamp in new:
+                self.update_ta(symbol, bars.loc[timestamp])
+        except NotImplementedError:
+            log.debug("Re-running TA over all of %s, not every algo can stream", symbol)
+            for key in [k for k in self._ta_streams if k[0] == symbol]:
+                del self._ta_streams[key]
+            TAPipeline(self._ta_algos, max_workers=self._ta_workers).apply({symbol: s_obj})
+
+        self._ta_index[symbol] = s_obj.ohlc.bars.index
+        self.signal_caches[symbol].bars_version += 1
+
+    def update_ta(self, symbol: str, new_bar: pd.Series) -> dict:
+        # rather than re-running every algo over the whole history, feed the bar to each algo's
+        # stream and write what comes back in to the symbol's bars. Streams are warmed up on the
+        # bars before new_bar the first time they're used
+        bars = self.symbols[symbol].ohlc.bars
+        row = dict()
         for a in self._ta_algos:
-            for s_str in self.symbols:
-                self.symbols[s_str].ohlc.apply_ta(a)
-                # s_obj.ohlc.apply_ta(a)
+            key = (symbol, a)
+            if key not in self._ta_streams:
+                self._ta_streams[key] = a.stream(bars.loc[bars.index < new_bar.name])
+            row.update(self._ta_streams[key].update(new_bar))
+
+        for column, value in row.items():
+            bars.at[new_bar.name, column] = value
+        self.signal_caches[symbol].bars_version += 1
+        return row
 
     @property
     def unique_symbols(self):
@@ -1,10 +1,14 @@
 from symbol import Symbol
+from typing import Callable
 from .time_manager import BackTestTimeManager
 from .symbol_play import SymbolPlay
 from .play_config import PlayConfig
 from .controller_config import ControllerConfig
 from broker_api import ITradeAPI
 from .telemetry import ITelemetry
+from .bar_window import BarWindow
+from .entry_signal_board import EntrySignalBoard
+from .config_totals import ConfigTotals
 
 import logging
 
@@ -19,11 +23,17 @@ class SymbolHandler:
     time_manager: BackTestTimeManager
     started: bool
     _symbol_plays: set[SymbolPlay]
-    active_symbol_plays: set[SymbolPlay]
+    _active_plays: dict[SymbolPlay, None]
+    active_symbol_plays: list[SymbolPlay]
     play_config: PlayConfig
     broker: ITradeAPI
     run_id: str
     telemetry: ITelemetry
+    bar_windows: dict[str, BarWindow]
+    signal_caches: dict[str, dict]
+    entry_signals: EntrySignalBoard
+    config_totals: dict[PlayConfig, ConfigTotals]
+    on_active_changed: Callable[[SymbolPlay], None]
 
     def __init__(
         self,
@@ -33,28 +43,48 @@ class SymbolHandler:
         broker: ITradeAPI,
         run_id: str,
         telemetry: ITelemetry,
+        bar_windows: dict[str, BarWindow],
+        signal_caches: dict[str, dict] = None,
+        entry_signals: EntrySignalBoard = None,
+        config_totals: dict[PlayConfig, ConfigTotals] = None,
+        on_active_changed: Callable[[SymbolPlay], None] = None,
     ) -> None:
         self._symbols = symbols
         self._ta_algos = set()
         self.started = False
         self._symbol_plays = set()
+        # kept up to date by the plays themselves, see _play_active_changed(). a dict so that it
+        # runs in the order the plays started
+        self._active_plays = dict()
         self.time_manager = time_manager
         self.play_config = play_config
         self.broker = broker
         self.run_id = run_id
         self.telemetry = telemetry
+        self.bar_windows = bar_windows
+        self.signal_caches = signal_caches
+        self.entry_signals = entry_signals
+        if config_totals is None:
+            config_totals = dict()
+        self.config_totals = config_totals
+        # passed on from the plays, eg. for PlayOrchestrator to rebuild what it runs each tick
+        self.on_active_changed = on_active_changed
 
     def __repr__(self) -> str:
         return f"SymbolGroup {self.play_config.name} ({len(self._symbols)} symbols)"
 
     @property
-    def active_symbol_plays(self) -> set[SymbolPlay]:
-        active = set()
-        for c in self._symbol_plays:
-            if len(c.instances) > 0:
-                active.add(c)
+    def active_symbol_plays(self) -> list[SymbolPlay]:
+        return list(self._active_plays)
+
+    def _play_active_changed(self, play: SymbolPlay) -> None:
+        if play.active:
+            self._active_plays[play] = None
+        else:
+            self._active_plays.pop(play, None)
 
-        return active
+        if self.on_active_changed is not None:
+            self.on_active_changed(play)
 
     def start(self):
         if self.started:
@@ -73,6 +103,11 @@ class SymbolHandler:
                 time_manager=self.time_manager,
                 run_id=self.run_id,
                 telemetry=self.telemetry,
+                bar_window=self.bar_windows[s],
+                signal_cache=None if self.signal_caches is None else self.signal_caches[s],
+                entry_signals=self.entry_signals,
+                config_totals=self.config_totals,
+                on_active_changed=self._play_active_changed,
             )
             self._symbol_plays.add(_new_controller)
             _new_controller.start()
@@ -93,6 +128,17 @@ class SymbolHandler:
         for c in self.active_symbol_plays:
             c.run()
 
+    def get_instance_summaries(self) -> list[dict]:
+        summaries = []
+        for c in self._symbol_plays:
+            summaries += c.get_instance_summaries()
+        return summaries
+
+    def get_config_totals(self) -> ConfigTotals:
+        if self.play_config not in self.config_totals:
+            return ConfigTotals(self.play_config)
+        return self.config_totals[self.play_config]
+
     @property
     def play_config(self) -> ControllerConfig:
         return self._play_config
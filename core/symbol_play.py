@@ -1,6 +1,6 @@
 from abc import ABC
 from symbol import Symbol
-from typing import List
+from typing import Callable, List
 from .play_config import PlayConfig
 from broker_api import ITradeAPI
 import uuid
@@ -9,8 +9,14 @@ from .controller_config import ControllerConfig
 from .state_terminated import StateTerminated
 from .state import State
 from .instance_list import InstanceList
+from .instance_summary import InstanceSummary
+from .config_totals import ConfigTotals
 from .time_manager import ITimeManager
 from .telemetry import ITelemetry
+from .bar_window import BarWindow
+from .trigger_index import TriggerIndex
+from .order_cache import OrderCache
+from .entry_signal_board import EntrySignalBoard
 
 import logging
 
@@ -24,10 +30,16 @@ class SymbolPlay(ABC):
     broker: ITradeAPI
     play_instance_class: Instance
     play_id: str
-    terminated_instances: List[Instance]
+    terminated_instances: List[InstanceSummary]
     time_manager: ITimeManager
     run_id: str
     telemetry: ITelemetry
+    bar_window: BarWindow
+    signal_cache: dict
+    triggers: TriggerIndex
+    entry_signals: EntrySignalBoard
+    config_totals: dict[PlayConfig, ConfigTotals]
+    on_active_changed: Callable[["SymbolPlay"], None]
 
     def __init__(
         self,
@@ -37,7 +49,12 @@ class SymbolPlay(ABC):
         time_manager: ITimeManager,
         run_id: str,
         telemetry: ITelemetry,
+        bar_window: BarWindow,
+        signal_cache: dict = None,
         play_instance_class: Instance = Instance,
+        entry_signals: EntrySignalBoard = None,
+        config_totals: dict[PlayConfig, ConfigTotals] = None,
+        on_active_changed: Callable[["SymbolPlay"], None] = None,
     ) -> None:
         self.symbol = symbol
         self.time_manager = time_manager
@@ -49,17 +66,69 @@ class SymbolPlay(ABC):
         self.play_instance_class = play_instance_class
         self.instances = []
         self.terminated_instances = []
+        # the same instances by play config, so get_instances() doesn't have to look through all of
+        # them. live ones are kept in dicts for ordered removal
+        self._live_by_config = dict()
+        self._terminated_by_config = dict()
         self.telemetry = telemetry
+        self.bar_window = bar_window
+        # normally the symbol's cache from SymbolData, shared by every play on the symbol
+        if signal_cache is None:
+            signal_cache = dict()
+        self.signal_cache = signal_cache
+        # instances waiting on price park themselves here and are skipped until it's reached. their
+        # orders are parked in the OrderCache too, so they aren't refreshed every tick either
+        self.triggers = TriggerIndex(broker if isinstance(broker, OrderCache) else None)
+        # normally shared with the rest of the category, see CategoryHandler
+        if entry_signals is None:
+            entry_signals = EntrySignalBoard(time_manager)
+        self.entry_signals = entry_signals
+        # added to as instances terminate, normally shared with the rest of the category too
+        if config_totals is None:
+            config_totals = dict()
+        self.config_totals = config_totals
+        # called when the first instance starts or the last one drains, so that the SymbolHandler
+        # can keep its active plays without checking every play each tick
+        self.on_active_changed = on_active_changed
+
+    @property
+    def active(self) -> bool:
+        return len(self.instances) > 0
+
+    def _active_changed(self, was_active: bool) -> None:
+        if self.active != was_active and self.on_active_changed is not None:
+            self.on_active_changed(self)
 
     def start(self):
         if len(self.instances) > 0:
             raise RuntimeError("Already started plays, can't call start_play() twice")
 
         # for template in self.play_config.play_templates:
-        self.instances.append(self.play_instance_class(self.play_config, self))
+        self._add_live(self.play_instance_class(self.play_config, self))
 
     def register_instance(self, new_instance):
-        self.instances.append(new_instance)
+        self._add_live(new_instance)
+
+    def _add_live(self, instance: Instance) -> None:
+        # appended in place - forks happen while run() is going through the list
+        was_active = self.active
+        self.instances.append(instance)
+        self._live_by_config.setdefault(instance.config, dict())[instance] = None
+        self._active_changed(was_active)
+
+    def _archive(self, instance: Instance) -> None:
+        # only the summary is kept, so the instance and everything it references can be let go
+        del self._live_by_config[instance.config][instance]
+        summary = InstanceSummary.from_instance(instance)
+        self.terminated_instances.append(summary)
+
+        if instance.config not in self._terminated_by_config:
+            self._terminated_by_config[instance.config] = InstanceList()
+        self._terminated_by_config[instance.config].append(summary)
+
+        if instance.config not in self.config_totals:
+            self.config_totals[instance.config] = ConfigTotals(instance.config)
+        self.config_totals[instance.config].add(summary)
 
     def _generate_play_id(self, length: int = 6):
         return "play-" + self.symbol.yf_symbol + uuid.uuid4().hex[:length].upper()
@@ -85,27 +154,37 @@ class SymbolPlay(ABC):
     def run(self):
         new_instances = []
         retained_instances = []
+        if len(self.triggers) > 0:
+            self.triggers.wake(
+                low=self.bar_window.latest("Low"), high=self.bar_window.latest("High")
+            )
+
         for i in self.instances:
-            i.run()
+            if i not in self.triggers:
+                i.run()
 
             if isinstance(i.state, StateTerminated):
                 # if this instance is terminated, spin up a new one
-                self.terminated_instances.append(i)
-                new_instances.append(self.play_instance_class(i.config, self))
+                self._archive(i)
+                new_instance = self.play_instance_class(i.config, self)
+                self._live_by_config[new_instance.config][new_instance] = None
+                new_instances.append(new_instance)
                 # gain = self.total_gain
                 # print(f"Total gain for this symbol: {gain:,.2f}")
 
             else:
                 retained_instances.append(i)
 
+        was_active = self.active
         updated_instances = new_instances + retained_instances
         self.instances = updated_instances
+        self._active_changed(was_active)
 
         # self.get_instances(self.instances[0].config)
 
     def fork_instance(self, instance: Instance, new_state: State, **kwargs):
         kwargs["previous_state"] = instance.state
-        self.instances.append(
+        self._add_live(
             self.play_instance_class(
                 template=instance.config,
                 play_controller=self,
@@ -115,10 +194,13 @@ class SymbolPlay(ABC):
         )
 
     def get_instances(self, template: PlayConfig):
-        all_instances = self.instances + self.terminated_instances
         matched_instances = InstanceList()
-        for i in all_instances:
-            if i.config == template:
-                matched_instances.append(i)
+        for i in self._live_by_config.get(template, ()):
+            matched_instances.append(i)
+        if template in self._terminated_by_config:
+            matched_instances.extend(self._terminated_by_config[template])
 
         return matched_instances
+
+    def get_instance_summaries(self) -> list[dict]:
+        return [i.as_dict() for i in self.terminated_instances]
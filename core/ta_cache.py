@@ -0,0 +1,178 @@
+from symbol import Symbol
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+
+from .ita import ITA
+
+import logging
+
+log = logging.getLogger(__name__)
+
+
+class TAColumns:
+    # same shape as what ITA.do_ta returns - the TA columns are in df
+    df: pd.DataFrame
+
+    def __init__(self, df: pd.DataFrame) -> None:
+        self.df = df
+
+
+class TACache:
+    """
+    On-disk cache of TA output, so that back tests over a window that's already been run don't
+    recompute it. Entries are keyed by a hash of the symbol, the bar index, the algo's input
+    columns and the algo itself (its name, declared columns and do_ta source, so changing the
+    algo's parameters in code changes the key). Each entry is a directory of .npy files, one per
+    output column, which are read straight back in to memory on a hit - apply_ta() joins them on
+    to the bars, which copies them anyway.
+
+    Least recently used entries are deleted once the cache grows past max_bytes
+    """
+
+    directory: str
+    max_bytes: int
+
+    def __init__(self, directory: str = "ta_cache", max_bytes: int = 2 * 1024**3) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def wrap(self, algo: ITA, symbol: Symbol) -> "CachedTA":
+        # stands in for algo when handed to Symbol.ohlc.apply_ta()
+        return CachedTA(algo=algo, symbol=symbol, cache=self)
+
+    def key(self, algo: ITA, symbol: Symbol, ohlc_data: pd.DataFrame) -> str:
+        h = hashlib.blake2b(digest_size=20)
+        h.update(symbol.yf_symbol.encode())
+        h.update(self._algo_identity(algo).encode())
+
+        # the bar index covers interval and range, the input columns cover the prices themselves
+        h.update(ohlc_data.index.asi8.tobytes())
+        for column in algo.inputs:
+            h.update(column.encode())
+            h.update(np.ascontiguousarray(ohlc_data[column].to_numpy()).tobytes())
+
+        return h.hexdigest()
+
+    @staticmethod
+    def _algo_identity(algo: ITA) -> str:
+        try:
+            source = inspect.getsource(algo.do_ta)
+        except (OSError, TypeError):
+            source = ""
+        return json.dumps(
+            [
+                algo.__module__,
+                algo.__qualname__,
+                list(algo.inputs),
+                list(algo.outputs),
+                source,
+            ]
+        )
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def load(self, key: str, index: pd.Index) -> pd.DataFrame:
+        path = self._path(key)
+        try:
+            with open(os.path.join(path, "meta.json")) as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return None
+
+        columns = dict()
+        for n, (column, dtype) in enumerate(meta["columns"]):
+            values = np.load(os.path.join(path, f"{n}.npy"))
+            if dtype == "object":
+                # strings are stored fixed width, so they load without pickle
+                values = values.astype(object)
+            columns[column] = values
+
+        # touch, so that eviction sees it as recently used
+        os.utime(path)
+        return pd.DataFrame(columns, index=index)
+
+    def store(self, key: str, df: pd.DataFrame) -> None:
+        path = self._path(key)
+        if os.path.exists(path):
+            return
+
+        for column in df.columns:
+            if df[column].dtype == object and not all(isinstance(v, str) for v in df[column]):
+                log.debug(f"Not caching TA - column {column} is neither numeric nor strings")
+                return
+
+        # written somewhere else and renamed in to place, so that parallel workers never see half
+        # an entry
+        staging = tempfile.mkdtemp(dir=self.directory, prefix=".staging-")
+        try:
+            meta = {"columns": []}
+            for n, column in enumerate(df.columns):
+                values = df[column].to_numpy()
+                dtype = str(values.dtype)
+                if dtype == "object":
+                    values = values.astype(str)
+                np.save(os.path.join(staging, f"{n}.npy"), values)
+                meta["columns"].append([column, dtype])
+
+            with open(os.path.join(staging, "meta.json"), "w") as f:
+                json.dump(meta, f)
+
+            os.rename(staging, path)
+        except OSError:
+            # someone else got there first
+            shutil.rmtree(staging, ignore_errors=True)
+            return
+
+        self.evict()
+
+    def evict(self) -> None:
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if not entry.is_dir() or entry.name.startswith("."):
+                continue
+            size = sum(f.stat().st_size for f in os.scandir(entry.path))
+            entries.append((entry.stat().st_mtime, size, entry.path))
+            total += size
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            log.debug(f"Evicting TA cache entry {path}")
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+
+class CachedTA:
+    """Looks like an ITA to Symbol.ohlc.apply_ta(), but goes to the TACache before running do_ta"""
+
+    algo: ITA
+    symbol: Symbol
+    cache: TACache
+
+    def __init__(self, algo: ITA, symbol: Symbol, cache: TACache) -> None:
+        self.algo = algo
+        self.symbol = symbol
+        self.cache = cache
+        self.__name__ = algo.__name__
+
+    def do_ta(self, ohlc_data: pd.DataFrame):
+        key = self.cache.key(self.algo, self.symbol, ohlc_data)
+        df = self.cache.load(key, ohlc_data.index)
+        if df is not None:
+            log.debug(f"{self.symbol.yf_symbol}: {self.__name__} loaded from TA cache")
+            return TAColumns(df)
+
+        result = self.algo.do_ta(ohlc_data)
+        # hits are rebuilt on ohlc_data's index, so only cache output that lines up with it
+        if result.df.index.equals(ohlc_data.index):
+            self.cache.store(key, result.df)
+        return result
@@ -0,0 +1,95 @@
+from concurrent.futures import ThreadPoolExecutor
+from graphlib import TopologicalSorter
+from symbol import Symbol
+
+from .ita import ITA
+from .ta_cache import TACache
+
+import logging
+
+log = logging.getLogger(__name__)
+
+OHLC_COLUMNS = ("Open", "High", "Low", "Close", "Volume")
+
+
+def _worker_setup() -> None:
+    # btalib keeps its working state in a threading.local that's only filled in on the thread that
+    # imported it, so every other thread has to be given the same empty state before running TA
+    try:
+        from btalib.meta.metadata import metadata
+    except ImportError:
+        return
+
+    metadata.callstack = []
+    metadata.minperiods = dict()
+    metadata.minperiod = dict()
+
+
+class TAPipeline:
+    """
+    Orders a set of TA algos by their declared inputs and outputs - an algo that reads a column
+    another algo adds runs after it - and applies each one to each symbol exactly once. Symbols
+    don't depend on each other, so they're worked through in parallel threads. With a TACache,
+    results are loaded from disk where they've been computed before
+    """
+
+    algos: list[ITA]
+    max_workers: int
+    cache: TACache
+
+    def __init__(
+        self,
+        algos,
+        max_workers: int = None,
+        available_columns: set[str] = None,
+        cache: TACache = None,
+    ) -> None:
+        # available_columns are already on the bars eg. from algos applied earlier
+        available = set(OHLC_COLUMNS) | (available_columns or set())
+        self.algos = self._sort(algos, available)
+        self.max_workers = max_workers
+        self.cache = cache
+
+    @staticmethod
+    def _sort(algos, available: set[str]) -> list[ITA]:
+        producers = dict()
+        for a in algos:
+            for column in a.outputs:
+                if column in producers:
+                    log.warning(
+                        f"Column {column} is output by both {producers[column].__name__} and "
+                        f"{a.__name__}"
+                    )
+                producers[column] = a
+
+        graph = TopologicalSorter()
+        for a in algos:
+            depends_on = set()
+            for column in a.inputs:
+                if column in producers:
+                    if producers[column] is not a:
+                        depends_on.add(producers[column])
+                elif column not in available:
+                    raise ValueError(
+                        f"{a.__name__} needs column {column}, but no registered algo outputs it"
+                    )
+
+            graph.add(a, *depends_on)
+
+        # raises graphlib.CycleError if algos depend on each other
+        return list(graph.static_order())
+
+    def apply(self, symbols: dict[str, Symbol]) -> None:
+        if not self.algos or not symbols:
+            return
+
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, initializer=_worker_setup
+        ) as executor:
+            # list() so that any exception from a worker gets raised here
+            list(executor.map(self._apply_symbol, symbols.values()))
+
+    def _apply_symbol(self, symbol: Symbol) -> None:
+        for a in self.algos:
+            symbol.ohlc.apply_ta(self.cache.wrap(a, symbol) if self.cache else a)
+        log.debug(f"{symbol.yf_symbol}: Applied {len(self.algos)} TA algos")
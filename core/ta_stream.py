@@ -0,0 +1,49 @@
+from collections import deque
+from math import fsum, isnan, nan
+
+
+class EmaStream:
+    """
+    Exponential moving average, one value at a time. Seeded with the mean of the first period
+    values and then prev * (1 - alpha) + value * alpha, same as btalib.ema. NaN until seeded
+    """
+
+    __slots__ = ("period", "alpha", "value", "_seed")
+
+    def __init__(self, period: int) -> None:
+        self.period = period
+        self.alpha = 2.0 / (1 + period)
+        self.value = nan
+        self._seed = []
+
+    def update(self, new_value: float) -> float:
+        if self._seed is not None:
+            # leading NaNs (eg. MACD before the slow EMA is ready) don't count towards the seed
+            if isnan(new_value):
+                return nan
+
+            self._seed.append(new_value)
+            if len(self._seed) == self.period:
+                self.value = sum(self._seed) / self.period
+                self._seed = None
+            return self.value
+
+        self.value = self.value * (1.0 - self.alpha) + new_value * self.alpha
+        return self.value
+
+
+class SmaStream:
+    """Simple moving average over the last period values, NaN until period values have been seen"""
+
+    __slots__ = ("period", "value", "_window")
+
+    def __init__(self, period: int) -> None:
+        self.period = period
+        self.value = nan
+        self._window = deque(maxlen=period)
+
+    def update(self, new_value: float) -> float:
+        self._window.append(new_value)
+        if len(self._window) == self.period:
+            self.value = fsum(self._window) / self.period
+        return self.value
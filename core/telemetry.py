@@ -4,8 +4,21 @@ import boto3
 import botocore
 import random
 import json
+import queue
+import threading
+import atexit
+import time
+import os
+import re
+import sqlite3
+import numpy as np
+import pandas as pd
 from .constants import RT_BACKTEST, RT_PAPER, RT_REAL, RT_DICT
 
+import logging
+
+log = logging.getLogger(__name__)
+
 
 class ITelemetry(ABC):
     def __init__(self):
@@ -15,6 +28,153 @@ class ITelemetry(ABC):
     def emit(self, *args, **kwargs):
         ...
 
+    def flush(self):
+        # block until everything emitted so far has been delivered
+        ...
+
+    def close(self):
+        # flush and release resources - nothing can be emitted afterwards
+        ...
+
+    def _message_body(self, event: str, *args, **kwargs) -> str:
+        if kwargs:
+            kwargs["event"] = event
+            sorted_kwargs = dict(sorted(kwargs.items()))
+        else:
+            sorted_kwargs = {"event": event}
+
+        if args:
+            sorted_kwargs["other_values"] = args
+
+        return json.dumps(sorted_kwargs)
+
+
+class NullTelemetry(ITelemetry):
+    def emit(self, *args, **kwargs):
+        ...
+
+
+class SqliteTelemetry(ITelemetry):
+    """
+    Writes events straight to local SQLite files instead of going via SQS and RDS. Each run_id gets
+    its own database file (so runs can be loaded or deleted independently) and each event type its
+    own table, with a column per field. Rows are buffered and appended batch_size at a time.
+
+    Nested values (dicts, lists) are stored as JSON strings, and numpy scalars eg. counts and prices
+    from the signal arrays as the Python int or float they hold. Use load() to read a run's events
+    back in to a DataFrame
+    """
+
+    directory: str
+    batch_size: int
+    _buffers: dict[tuple[str, str], list[dict]]
+    _connections: dict[str, sqlite3.Connection]
+    _columns: dict[tuple[str, str], list[str]]
+
+    def __init__(self, directory: str = "telemetry", batch_size: int = 1000):
+        self.directory = directory
+        self.batch_size = batch_size
+        self._buffers = dict()
+        self._connections = dict()
+        self._columns = dict()
+        os.makedirs(directory, exist_ok=True)
+
+    def emit(self, event: str, *args, **kwargs):
+        row = dict()
+        for k, v in kwargs.items():
+            if isinstance(v, (dict, list, tuple, set)):
+                v = json.dumps(list(v) if isinstance(v, set) else v, default=self._plain)
+            elif isinstance(v, np.generic):
+                # sqlite3 can't bind np.int64 at all, and stores np.float64 as a blob
+                v = v.item()
+            row[k] = v
+
+        if args:
+            row["other_values"] = json.dumps(args, default=self._plain)
+
+        # "Play start" carries play_id, instance events carry run_id - both are str(PlayOrchestrator)
+        run_id = kwargs.get("run_id", kwargs.get("play_id", "unknown"))
+        key = (run_id, self._table_name(event))
+        buffer = self._buffers.setdefault(key, [])
+        buffer.append(row)
+        if len(buffer) >= self.batch_size:
+            self._write(key)
+
+    def flush(self):
+        for key in self._buffers:
+            self._write(key)
+
+    def close(self):
+        self.flush()
+        for conn in self._connections.values():
+            conn.close()
+        self._connections = dict()
+
+    @classmethod
+    def load(
+        cls, run_id: str, event: str, directory: str = "telemetry"
+    ) -> pd.DataFrame:
+        # read only, so asking for a run that doesn't exist raises rather than creating an empty file
+        path = cls._path(directory, run_id)
+        with sqlite3.connect(f"file:{path}?mode=ro", uri=True) as conn:
+            return pd.read_sql_query(
+                f'SELECT * FROM "{cls._table_name(event)}"', conn
+            )
+
+    @staticmethod
+    def _plain(value):
+        # for json.dumps, which doesn't know numpy scalars either
+        if isinstance(value, np.generic):
+            return value.item()
+        raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+    @staticmethod
+    def _table_name(event: str) -> str:
+        return re.sub(r"[^a-z0-9]+", "_", event.lower()).strip("_")
+
+    @staticmethod
+    def _path(directory: str, run_id: str) -> str:
+        return os.path.join(directory, f"{run_id}.sqlite")
+
+    def _connection(self, run_id: str) -> sqlite3.Connection:
+        if run_id not in self._connections:
+            # parallel back test workers share a run_id, so they can end up writing the same file
+            conn = sqlite3.connect(self._path(self.directory, run_id), timeout=60)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._connections[run_id] = conn
+        return self._connections[run_id]
+
+    def _write(self, key: tuple[str, str]):
+        rows = self._buffers[key]
+        if not rows:
+            return
+
+        run_id, table = key
+        conn = self._connection(run_id)
+
+        columns = self._columns.get(key)
+        if columns is None:
+            conn.execute(f'CREATE TABLE IF NOT EXISTS "{table}" (_row INTEGER PRIMARY KEY)')
+            columns = [c[1] for c in conn.execute(f'PRAGMA table_info("{table}")')]
+            self._columns[key] = columns
+
+        for row in rows:
+            for k in row:
+                if k not in columns:
+                    conn.execute(f'ALTER TABLE "{table}" ADD COLUMN "{k}"')
+                    columns.append(k)
+
+        insert_columns = [c for c in columns if c != "_row"]
+        column_sql = ", ".join(f'"{c}"' for c in insert_columns)
+        placeholders = ", ".join("?" for _ in insert_columns)
+        with conn:
+            conn.executemany(
+                f'INSERT INTO "{table}" ({column_sql}) VALUES ({placeholders})',
+                [tuple(row.get(c) for c in insert_columns) for row in rows],
+            )
+
+        self._buffers[key] = []
+
 
 class Sqs(ITelemetry):
     _sqs_url: str
@@ -28,17 +188,156 @@ class Sqs(ITelemetry):
         self._sqs_message_group_id = str(random.randint(1000, 9999))
 
     def emit(self, event: str, *args, **kwargs):
-        if kwargs:
-            kwargs["event"] = event
-            sorted_kwargs = dict(sorted(kwargs.items()))
-        else:
-            sorted_kwargs = {"event": event}
-
-        if args:
-            sorted_kwargs["other_values"] = args
-
         self._sqs_handle.send_message(
             QueueUrl=self._sqs_url,
-            MessageBody=(json.dumps(sorted_kwargs)),
+            MessageBody=self._message_body(event, *args, **kwargs),
             MessageGroupId=self._sqs_message_group_id,
         )
+
+
+class SqsBatched(ITelemetry):
+    """
+    Queues events in memory and sends them from a background thread with send_message_batch, up
+    to 10 at a time. A batch goes out once it has 10 messages or its oldest message has waited
+    max_latency seconds. The queue holds at most max_queue messages - once it's full, emit()
+    blocks until the sender catches up.
+
+    sqs_client defaults to a boto3 SQS client, but anything with send_message_batch will do eg.
+    InMemorySqs for testing
+    """
+
+    BATCH_SIZE = 10
+    _FLUSH = object()
+    _STOP = object()
+
+    _sqs_url: str
+    _sqs_handle: any
+    _sqs_message_group_id: str
+    _queue: queue.Queue
+    _max_latency: float
+
+    def __init__(
+        self,
+        store: parameter_store.IParameterStore,
+        run_type: int,
+        max_latency: float = 1.0,
+        max_queue: int = 10000,
+        sqs_client=None,
+    ):
+        self._sqs_url = store.get("/tabot/telemetry/queue/backtest")
+        self._sqs_handle = sqs_client if sqs_client else boto3.client("sqs")
+        self._sqs_message_group_id = str(random.randint(1000, 9999))
+        self._max_latency = max_latency
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._closed = False
+
+        self._sender = threading.Thread(target=self._send_loop, daemon=True)
+        self._sender.start()
+        # daemon thread dies with the interpreter, so make sure whatever is queued gets sent first
+        atexit.register(self.close)
+
+    def emit(self, event: str, *args, **kwargs):
+        if self._closed:
+            raise RuntimeError("Can't emit telemetry after close()")
+
+        self._queue.put(self._message_body(event, *args, **kwargs))
+
+    def flush(self):
+        if self._closed:
+            return
+
+        self._queue.put(self._FLUSH)
+        self._queue.join()
+
+    def close(self):
+        if self._closed:
+            return
+
+        self._closed = True
+        self._queue.put(self._STOP)
+        self._sender.join()
+
+    def _send_loop(self):
+        batch = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                message = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                # oldest message has waited long enough
+                self._send(batch)
+                batch = []
+                deadline = None
+                continue
+
+            if message is self._FLUSH or message is self._STOP:
+                self._send(batch)
+                # task_done for everything in the batch has been called, now the marker itself
+                self._queue.task_done()
+                batch = []
+                deadline = None
+                if message is self._STOP:
+                    return
+                continue
+
+            batch.append(message)
+            if deadline is None:
+                deadline = time.monotonic() + self._max_latency
+
+            if len(batch) == self.BATCH_SIZE:
+                self._send(batch)
+                batch = []
+                deadline = None
+
+    def _send(self, batch: list[str]):
+        if not batch:
+            return
+
+        try:
+            response = self._sqs_handle.send_message_batch(
+                QueueUrl=self._sqs_url,
+                Entries=[
+                    {
+                        "Id": str(n),
+                        "MessageBody": body,
+                        "MessageGroupId": self._sqs_message_group_id,
+                    }
+                    for n, body in enumerate(batch)
+                ],
+            )
+            for failed in response.get("Failed", []):
+                log.error(
+                    f"Failed to send telemetry message: {failed.get('Message')} ({failed.get('Code')})"
+                )
+        except Exception as e:
+            log.exception(f"Failed to send batch of {len(batch)} telemetry messages: {str(e)}")
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+
+class InMemorySqs:
+    """Local stand-in for a boto3 SQS client, holds sent message bodies in memory"""
+
+    messages: list[dict]
+
+    def __init__(self):
+        self.messages = []
+        self.batch_count = 0
+
+    def send_message(self, QueueUrl: str, MessageBody: str, MessageGroupId: str):
+        self.messages.append(
+            {"QueueUrl": QueueUrl, "Body": MessageBody, "MessageGroupId": MessageGroupId}
+        )
+        return {"MessageId": str(len(self.messages))}
+
+    def send_message_batch(self, QueueUrl: str, Entries: list[dict]):
+        self.batch_count += 1
+        for e in Entries:
+            self.send_message(
+                QueueUrl=QueueUrl,
+                MessageBody=e["MessageBody"],
+                MessageGroupId=e["MessageGroupId"],
+            )
+        return {"Successful": [{"Id": e["Id"]} for e in Entries], "Failed": []}
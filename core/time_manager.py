@@ -53,10 +53,17 @@ class ITimeManager(ABC):
     def tick(self):
         ...
 
+    @property
+    @abstractmethod
+    def eof(self):
+        ...
+
 
 class BackTestTimeManager(ITimeManager):
     _symbols: Set[Symbol]
     _date: pd.Timestamp
+    _timeline: pd.DatetimeIndex
+    _position: int
     tick_padding: int = 90
     now: pd.Timestamp
     first: pd.Timestamp
@@ -67,6 +74,10 @@ class BackTestTimeManager(ITimeManager):
     def __init__(self, interval: int = 300) -> None:
         self._symbols = set()
         self._date = None
+        self._timeline = None
+        self._position = None
+        self._first = None
+        self._last = None
 
         self._interval = interval
         self._delta = relativedelta(seconds=interval)
@@ -74,7 +85,14 @@ class BackTestTimeManager(ITimeManager):
         self._symbols = set()
 
     def start(self):
-        self.now = self.first
+        # the horizon is fixed once the back test starts, so work it out once and then just walk an index
+        # through the ticks instead of rescanning every symbol's bars each time now changes
+        self._first = self._find_first()
+        self._last = self._find_last()
+        self._timeline = pd.date_range(
+            start=self._first, end=self._last, freq=pd.Timedelta(seconds=self._interval)
+        )
+        self._move(0)
 
     """
     def add_symbol(self, symbol: Symbol) -> bool:
@@ -85,8 +103,12 @@ class BackTestTimeManager(ITimeManager):
         symbol_set = set(symbols)
         self._symbols = self._symbols | symbol_set
 
-    @property
-    def first(self) -> pd.Timestamp:
+        # horizon may have changed, so the timeline needs to be rebuilt by start()
+        self._timeline = None
+        self._first = None
+        self._last = None
+
+    def _find_first(self) -> pd.Timestamp:
         if len(self._symbols) == 0:
             raise RuntimeError("No symbols added yet")
 
@@ -104,8 +126,7 @@ class BackTestTimeManager(ITimeManager):
         padded_earliest = earliest + relativedelta(seconds=padding)
         return padded_earliest
 
-    @property
-    def last(self) -> pd.Timestamp:
+    def _find_last(self) -> pd.Timestamp:
         if len(self._symbols) == 0:
             raise RuntimeError("No symbols added yet")
 
@@ -120,6 +141,26 @@ class BackTestTimeManager(ITimeManager):
 
         return latest
 
+    @property
+    def first(self) -> pd.Timestamp:
+        if self._first is None:
+            return self._find_first()
+        return self._first
+
+    @property
+    def last(self) -> pd.Timestamp:
+        if self._last is None:
+            return self._find_last()
+        return self._last
+
+    @property
+    def timeline(self) -> pd.DatetimeIndex:
+        if self._timeline is None:
+            raise TimeManagerNotStartedError(
+                f"Timeline not built. Have you called start() yet?"
+            )
+        return self._timeline
+
     @property
     def now(self) -> pd.Timestamp:
         if not self._date:
@@ -133,47 +174,49 @@ class BackTestTimeManager(ITimeManager):
 
     @now.setter
     def now(self, new_date: pd.Timestamp) -> None:
-        if new_date < self.first:
+        timeline = self.timeline
+        if new_date < self._first:
             raise KeyError(
-                f"New date {new_date} is earlier than earliest date {self.first}"
+                f"New date {new_date} is earlier than earliest date {self._first}"
             )
-        if new_date > self.last:
-            raise KeyError(f"New date {new_date} is after latest date {self.last}")
+        if new_date > self._last:
+            raise KeyError(f"New date {new_date} is after latest date {self._last}")
 
+        # park on the last tick at or before new_date so that tick() carries on from there
+        self._position = timeline.searchsorted(new_date, side="right") - 1
         self._date = new_date
 
+    def _move(self, position: int) -> None:
+        self._position = position
+        self._date = self._timeline[position]
+
     def tick(self) -> pd.Timestamp:
-        # TODO raise exception or something if we try to tick in to the future
-        self.now = self.now + self._delta
-        return self.now
+        if self._date is None:
+            raise TimeManagerNotStartedError(
+                f"Current date not set. Have you called start() yet?"
+            )
+
+        next_position = self._position + 1
+        if next_position >= len(self._timeline):
+            raise KeyError(
+                f"New date {self._date + self._delta} is after latest date {self._last}"
+            )
+
+        self._move(next_position)
+        return self._date
 
     @property
-    def tick_ttl(self) -> int:
-        # now + padding is later than latest record, so return 0
-        # now + padding is less than latest record
-        #  - if we are backtesting, then return 0
-        #  - if we are not backtesting, then return now - (last record + 90)
-        #    - now 9:46
-        #    - last record (9.45 + 90) = 9:47
-        #
-        #    - now 9:49
-        #    -
+    def eof(self) -> bool:
+        return self._position == len(self.timeline) - 1
 
+    @property
+    def tick_ttl(self) -> int:
         # backtest will always return 0 - either we're ready to get a new row, or there will never be any more new rows to get
-
-        if self.now == self.latest:
+        if self.eof:
             raise KeyError(f"Backtesting - already at last row")
 
         return 0
 
-        padded_last = self.last + timedelta(seconds=self.tick_padding)
-        if self.now < padded_last:
-            return 0
-
-        now = datetime.utcnow()
-
-        return self.now - self._delta
-
 
 # a = Symbol("BTC-USD")
 # im = TimeManager([a])
@@ -0,0 +1,97 @@
+from bisect import bisect_left, bisect_right, insort
+
+import logging
+
+log = logging.getLogger(__name__)
+
+
+class TriggerIndex:
+    """
+    Stop loss and take profit levels of the parked instances of one SymbolPlay, each kept sorted.
+    An instance that is just waiting on price (eg. StateTakingProfit with its sell order open)
+    parks itself here instead of being run every tick. When a new bar comes in, wake() hands back
+    only the instances whose stop is above the bar's low or whose target is at or below its high -
+    the only ones that could have stopped out or filled - and unparks them so they get run.
+
+    Waking on the low rather than the close means a few instances get run that didn't need to be,
+    but never the other way around. So an instance's open order can't have filled while it's
+    parked. With an OrderCache, parking an instance along with its order_id parks the order there
+    too, which keeps it out of the per-tick refresh until the instance is woken
+    """
+
+    # sorted lists of (price, sequence) so that equal prices stay in a stable order, with the
+    # owning instance looked up by sequence
+    _stops: list[tuple[float, int]]
+    _targets: list[tuple[float, int]]
+    _owners: dict[int, object]
+    _parked: dict[object, tuple[int, float, float, str]]
+
+    def __init__(self, orders=None) -> None:
+        self._stops = []
+        self._targets = []
+        self._owners = dict()
+        self._parked = dict()
+        self._sequence = 0
+        # eg. OrderCache - anything with park(order_id) and unpark(order_id)
+        self._orders = orders
+
+    def __len__(self) -> int:
+        return len(self._parked)
+
+    def __contains__(self, instance) -> bool:
+        return instance in self._parked
+
+    def park(
+        self, instance, stop: float = None, target: float = None, order_id: str = None
+    ) -> None:
+        # either level can be None, eg. no stop loss set. an instance with neither would never
+        # wake, so it doesn't get parked
+        self.discard(instance)
+        if stop is None and target is None:
+            return
+
+        self._sequence += 1
+        sequence = self._sequence
+        self._owners[sequence] = instance
+        self._parked[instance] = (sequence, stop, target, order_id)
+        if stop is not None:
+            insort(self._stops, (stop, sequence))
+        if target is not None:
+            insort(self._targets, (target, sequence))
+        if order_id is not None and self._orders is not None:
+            self._orders.park(order_id)
+
+    def discard(self, instance) -> None:
+        parked = self._parked.pop(instance, None)
+        if parked is None:
+            return
+
+        sequence, stop, target, order_id = parked
+        del self._owners[sequence]
+        if stop is not None:
+            self._remove(self._stops, (stop, sequence))
+        if target is not None:
+            self._remove(self._targets, (target, sequence))
+        if order_id is not None and self._orders is not None:
+            self._orders.unpark(order_id)
+
+    def wake(self, low: float, high: float) -> list:
+        # stops above the low, then targets at or below the high
+        woken = dict()
+        stops_from = bisect_right(self._stops, (low, self._sequence + 1))
+        for _, sequence in self._stops[stops_from:]:
+            woken[self._owners[sequence]] = None
+
+        targets_to = bisect_right(self._targets, (high, self._sequence + 1))
+        for _, sequence in self._targets[:targets_to]:
+            woken[self._owners[sequence]] = None
+
+        for instance in woken:
+            self.discard(instance)
+
+        return list(woken)
+
+    @staticmethod
+    def _remove(levels: list[tuple[float, int]], level: tuple[float, int]) -> None:
+        position = bisect_left(levels, level)
+        del levels[position]
@@ -1,6 +1,6 @@
 # import __main__
 from parameter_store import Ssm, S3
-from core import PlayOrchestrator, StrategyHandler, RT_BACKTEST
+from core import PlayOrchestrator, StrategyHandler, RT_BACKTEST, configure_logging
 from strategies import (
     MacdPlayConfig,
     MacdStateEnteringPosition,
@@ -32,6 +32,9 @@ log.setLevel(level)
 logging.getLogger("strategies").setLevel(level)
 logging.getLogger("core").setLevel(level)
 
+# instance logs go to CloudWatch, and only ERROR and above while back testing
+configure_logging(quiet=True)
+
 sh = StrategyHandler(globals().copy())
 
 store = S3("mfers-tabot")
@@ -43,4 +46,5 @@ while not po.eof:
     po.run()
     print(f"Run {str(po)} finished processing records for {po.now}")
     po.sleep()
+po.shutdown()
 print(f"got to end of run ID {str(po)}")
@@ -9,3 +9,5 @@ from .macd import (
 from .sma import SMA
 
 from .macd_play_config import MacdPlayConfig
+
+from .macd_fast_backtest import MacdFastBacktest
@@ -7,7 +7,10 @@ from core import (
     StateTerminated,
     Instance,
     ITA,
+    ITAStream,
+    EmaStream,
 )
+from .macd_signals import MacdSignals
 
 import btalib
 import pandas as pd
@@ -23,6 +26,16 @@ log = logging.getLogger(__name__)
 class MacdTA(ITA):
     __tabot_strategy__: bool = True
 
+    inputs = ("Close",)
+    outputs = (
+        "macd_macd",
+        "macd_signal",
+        "macd_histogram",
+        "macd_crossover",
+        "macd_above_signal",
+        "macd_cycle",
+    )
+
     class MacdColumns:
         df: pd.DataFrame
 
@@ -82,44 +95,74 @@ class MacdTA(ITA):
 
         return MacdTA.MacdColumns(df)
 
+    class MacdStream(ITAStream):
+        def __init__(self) -> None:
+            self._fast = EmaStream(12)
+            self._slow = EmaStream(26)
+            self._signal = EmaStream(9)
+            self._above_signal = None
+
+        def update(self, new_bar: pd.Series) -> dict:
+            close = new_bar["Close"]
+            macd = self._fast.update(close) - self._slow.update(close)
+            signal = self._signal.update(macd)
+
+            # NaN compares False, same as the np.where in do_ta
+            above_signal = bool(macd > signal)
+            # first row is always a crossover, same as comparing against shift()
+            crossover = above_signal != self._above_signal
+            self._above_signal = above_signal
+
+            return {
+                "macd_macd": macd,
+                "macd_signal": signal,
+                "macd_histogram": macd - signal,
+                "macd_crossover": crossover,
+                "macd_above_signal": above_signal,
+                "macd_cycle": "blue" if above_signal else "red",
+            }
+
+    def stream(ohlc_data: pd.DataFrame) -> MacdStream:
+        stream = MacdTA.MacdStream()
+        for close in ohlc_data.Close.to_numpy(dtype=np.float64):
+            stream.update({"Close": close})
+        return stream
+
 
 class MacdStateWaiting(StateWaiting):
+    __slots__ = ()
+
     def __init__(self, parent_instance: Instance, previous_state: State = None) -> None:
         super().__init__(parent_instance=parent_instance, previous_state=previous_state)
 
     def check_exit(self):
-        self.log.log(9, f"{self.symbol_str}: Running check_exit()")
-        config_period = self.config.sma_comparison_period
+        return self.check_exit_shared(self._check_entry)
 
-        df = self.ohlc.get_range()
-        row = df.iloc[-1]
+    def _check_entry(self):
+        self.log.log(9, lambda: f"{self.symbol_str}: Running check_exit()")
+        config_period = self.config.sma_comparison_period
 
-        crossover = MacdStateWaiting.check_crossover(row)
-        macd_negative = MacdStateWaiting.check_macd_negative(row)
-        last_sma = MacdStateWaiting.get_last_sma(df=df)
-        recent_average_sma = MacdStateWaiting.get_recent_average_sma(
-            df=df, period=config_period
-        )
-        sma_trending_up = MacdStateWaiting.check_sma(
-            last_sma=last_sma, recent_average_sma=recent_average_sma
+        signals = MacdSignals.for_symbol(self.symbol, self.signal_cache)
+        position = signals.position(self.parent_instance.time_manager.now)
+        entry_signal = signals.entry_signal(
+            sma_comparison_period=config_period, check_sma=self.config.check_sma
         )
 
-        signal_found = crossover and macd_negative
-        if self.config.check_sma:
-            signal_found = sma_trending_up and signal_found
+        last_sma = signals.sma[position]
+        recent_average_sma = signals.sma[position - config_period + 1]
 
-        if signal_found:
+        if entry_signal[position]:
             # all conditions met for a buy
             self.log.info(
-                f"{self.symbol_str}: FOUND BUY SIGNAL AT {row.name} (MACD {round(row.macd_macd,4)} vs "
-                f"signal {round(row.macd_signal,4)}, SMA LAST {round(last_sma,4)} vs AVG {round(recent_average_sma,4)})"
+                lambda: f"{self.symbol_str}: FOUND BUY SIGNAL AT {signals.index[position]} (MACD {round(signals.macd[position],4)} vs "
+                f"signal {round(signals.macd_signal[position],4)}, SMA LAST {round(last_sma,4)} vs AVG {round(recent_average_sma,4)})"
             )
             return State.STATE_MOVE, MacdStateEnteringPosition, {}
 
         self.log.log(
             9,
-            f"{self.symbol_str}: No buy signal at {df.index[-1]} (MACD {round(row.macd_macd,4)} vs signal "
-            f"{round(row.macd_signal,4)}, SMA {round(last_sma,4)} vs {round(recent_average_sma,4)}",
+            lambda: f"{self.symbol_str}: No buy signal at {signals.index[position]} (MACD {round(signals.macd[position],4)} vs signal "
+            f"{round(signals.macd_signal[position],4)}, SMA {round(last_sma,4)} vs {round(recent_average_sma,4)}",
         )
         return State.STATE_STAY, None, {}
 
@@ -127,37 +170,24 @@ class MacdStateWaiting(StateWaiting):
         # TODO - change signature on base class to the variables that must be handed to next step?
 
         # calculate stop loss
-        df = self.ohlc.get_range()
+        signals = MacdSignals.for_symbol(self.symbol, self.signal_cache)
+        position = signals.position(self.parent_instance.time_manager.now)
 
-        blue_cycle_start = MacdStateWaiting.get_blue_cycle_start(df=df)
-        red_cycle_start = MacdStateWaiting.get_red_cycle_start(
-            df=df, before_date=blue_cycle_start
-        )
-
-        stop_loss_unit = MacdStateWaiting.calculate_stop_loss_unit_price(
-            df=df,
-            start_date=red_cycle_start,
-            end_date=blue_cycle_start,
-        )
-
-        stop_unit_date = MacdStateWaiting.calculate_stop_loss_date(
-            df=df,
-            start_date=red_cycle_start,
-            end_date=blue_cycle_start,
-        )
-
-        intervals_since_stop = MacdStateWaiting.count_intervals(
-            df=df, start_date=stop_unit_date
+        stop_loss_unit, stop_position, red_position, _ = signals.cycles.stop_loss(
+            position
         )
+        red_cycle_start = signals.index[red_position]
+        stop_unit_date = signals.index[stop_position]
+        intervals_since_stop = position - stop_position + 1
 
         self.log.log(
             logging.DEBUG,
-            f"{self.symbol}: Last cycle started on {red_cycle_start}, "
+            lambda: f"{self.symbol}: Last cycle started on {red_cycle_start}, "
             f"{intervals_since_stop} intervals ago",
         )
         self.log.log(
             logging.DEBUG,
-            f"{self.symbol}: The lowest price during that cycle was {stop_loss_unit} "
+            lambda: f"{self.symbol}: The lowest price during that cycle was {stop_loss_unit} "
             f"on {stop_unit_date}. This will be used as the stop loss for this instance",
         )
 
@@ -166,97 +196,57 @@ class MacdStateWaiting(StateWaiting):
 
         super().do_exit()
 
-    def calculate_stop_loss_unit_price(df: pd.DataFrame, start_date, end_date):
-        return df.loc[start_date:end_date].Close.min()
-
-    def calculate_stop_loss_date(df: pd.DataFrame, start_date, end_date):
-        return df.loc[start_date:end_date].Close.idxmin()
-
-    def count_intervals(df: pd.DataFrame, start_date, end_date=None):
-        if end_date == None:
-            return len(df.loc[start_date:])
-        else:
-            return len(df.loc[start_date:end_date])
-
-    def get_last_sma(df: pd.DataFrame):
-        return df.iloc[-1].sma
-
-    def get_recent_average_sma(df: pd.DataFrame, period: int):
-        return df.sma.iloc[-period]
-
-    def check_macd_negative(row):
-        macd_negative = row.macd_macd < 0
-        log.log(9, f"MACD {row.macd_macd} is < 0 = {macd_negative}")
-        return macd_negative
-
-    def check_crossover(row: pd.Series):
-        crossover = row.macd_crossover == True
-        log.log(9, f"MACD crossover = {crossover}")
-        return crossover
-
-    def check_sma(last_sma: float, recent_average_sma: float, ignore_sma: bool = False):
-        if ignore_sma:
-            log.warning(f"SMA check = True (ignore_sma is enabled)")
-            return True
-
-        sma_rising = last_sma > recent_average_sma
-        log.log(9, f"SMA check = {sma_rising} ({last_sma} > {recent_average_sma})")
-        return sma_rising
-
-    # maybe dont need these. need to store this stuff in instance, not state
-    def get_red_cycle_start(df: pd.DataFrame, before_date: pd.Timestamp):
-        return df.loc[
-            (df["macd_cycle"] == "blue")
-            & (df.index < before_date)
-            & (df.macd_crossover == True)
-        ].index[-1]
-
-    def get_blue_cycle_start(df: pd.DataFrame):
-        return df.loc[(df.macd_crossover == True) & (df.macd_macd < 0)].index[-1]
-
 
 class MacdStateEnteringPosition(StateEnteringPosition):
+    __slots__ = ()
+
     def __init__(self, previous_state: State, parent_instance: Instance = None) -> None:
         super().__init__(parent_instance=parent_instance, previous_state=previous_state)
 
     def check_exit(self):
-        log.log(9, f"checking exit on {self}")
+        log.log(9, "checking exit on %s", self)
         return super().check_exit()
 
     def do_exit(self):
-        log.log(9, f"doing exit on {self}")
+        log.log(9, "doing exit on %s", self)
         return super().do_exit()
 
 
 class MacdStateTakingProfit(StateTakingProfit):
+    __slots__ = ()
+
     def __init__(self, previous_state: State, parent_instance: Instance = None) -> None:
         # if you're going to override the take profit units or price, do it before calling super init
         super().__init__(parent_instance=parent_instance, previous_state=previous_state)
 
     def check_exit(self):
-        log.log(9, f"checking exit on {self}")
+        log.log(9, "checking exit on %s", self)
         return super().check_exit()
 
     # def do_exit(self):
-    #    log.log(9, f"doing exit on {self}")
+    #    log.log(9, "doing exit on %s", self)
     #    return super().do_exit()
 
 
 class MacdStateStoppingLoss(StateStoppingLoss):
+    __slots__ = ()
+
     def __init__(self, previous_state: State, parent_instance: Instance = None) -> None:
         super().__init__(parent_instance=parent_instance, previous_state=previous_state)
 
     def check_exit(self):
-        log.log(9, f"checking exit on {self}")
+        log.log(9, "checking exit on %s", self)
         return super().check_exit()
 
 
 class MacdStateTerminated(StateTerminated):
+    __slots__ = ()
+
     def __init__(self, previous_state: State, parent_instance: Instance = None) -> None:
         super().__init__(parent_instance=parent_instance, previous_state=previous_state)
 
     def check_exit(self):
-        log.log(9, f"checking exit on {self}")
+        log.log(9, "checking exit on %s", self)
         return State.STATE_STAY, None, {}
 
     def do_exit(self):
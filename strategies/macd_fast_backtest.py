@@ -0,0 +1,255 @@
+from symbol import Symbol
+from math import floor
+import uuid
+import numpy as np
+import pandas as pd
+
+from core import PlayConfig
+from .macd import (
+    MacdStateWaiting,
+    MacdStateEnteringPosition,
+    MacdStateTakingProfit,
+    MacdStateStoppingLoss,
+    MacdStateTerminated,
+)
+from .macd_signals import MacdSignals
+
+import logging
+
+log = logging.getLogger(__name__)
+
+
+class MacdFastBacktest:
+    """
+    Back tests one MACD play config on one symbol straight off the bar arrays, rather than walking
+    Instance and State objects through every tick. Entry signals and stop losses come from
+    MacdSignals. Every candidate entry's buy, take profit ladder and stop are resolved in one
+    batch by the symbol's ExitSimulator, then the entries that actually get taken are walked
+    through in order.
+
+    Follows what the state machine does with the stock Macd* states, one tick per bar:
+        * one instance at a time - a new one starts waiting on the bar after the last terminated
+        * on a buy signal, a limit buy at the aligned close (or a market buy at the close) for
+          max_play_size worth of units. The limit fills on the first bar from the signal bar whose
+          Low reaches it, or the instance terminates buy_timeout_intervals bars in, on the
+          buy_timeout_intervals-th bar
+        * once bought, a take profit sell limit is placed on the same bar. It fills on the first
+          bar from there whose High reaches the target. Each fill places the next take profit, at
+          a higher multiple of the risk, on the same bar
+        * the stop loss triggers on the first bar whose aligned Close is below the stop. Any sell
+          order that fills on that bar still fills, then the rest is sold at market (the Close)
+    The fill model is an assumption about the broker rather than something taken from it: every
+    order fills whole, a limit at its own price even when the bar gaps through it, and a market
+    order at the Close. It's what BackTestAPI is expected to do - EquivalenceCheck will show up
+    any differences for whichever BackTestAPI is installed.
+
+    run() returns the same summary dicts StateTerminated emits, for every instance that terminated
+    before the end of the bars. trades holds where each of them bought and exited
+    """
+
+    symbol: Symbol
+    play_config: PlayConfig
+    run_id: str
+    signals: MacdSignals
+    trades: list[dict]
+    results: list[dict]
+
+    def __init__(
+        self,
+        symbol: Symbol,
+        play_config: PlayConfig,
+        run_id: str = None,
+        start: pd.Timestamp = None,
+        end: pd.Timestamp = None,
+        signal_cache: dict = None,
+    ) -> None:
+        stock_states = (
+            (play_config.state_waiting, MacdStateWaiting),
+            (play_config.state_entering_position, MacdStateEnteringPosition),
+            (play_config.state_taking_profit, MacdStateTakingProfit),
+            (play_config.state_stopping_loss, MacdStateStoppingLoss),
+            (play_config.state_terminated, MacdStateTerminated),
+        )
+        for configured, stock in stock_states:
+            if configured is not stock:
+                raise ValueError(
+                    f"MacdFastBacktest only models the stock MACD states, but {play_config.name} "
+                    f"uses {configured.__name__} instead of {stock.__name__}"
+                )
+
+        self.symbol = symbol
+        self.play_config = play_config
+        self.run_id = run_id
+        # eg. shared by every play config run over the symbol, see MacdSignals.for_symbol()
+        self.signals = MacdSignals.for_symbol(symbol, signal_cache)
+        self.trades = []
+        self.results = []
+        self._trade_positions = []
+
+        self._close = self.signals.close
+
+        index = self.signals.index
+        # first bar at or after start, and the last bar at or before end
+        self._start = 0 if start is None else index.searchsorted(start, side="left")
+        self._end = len(index) if end is None else index.searchsorted(end, side="right")
+
+    def run(self) -> list[dict]:
+        config = self.play_config
+        entries = np.flatnonzero(
+            self.signals.entry_signal(
+                sma_comparison_period=config.sma_comparison_period,
+                check_sma=config.check_sma,
+            )
+        )
+        entries = entries[(entries >= self._start) & (entries < self._end)]
+
+        # how every candidate entry would play out, all in one batch. which of them actually get
+        # taken depends on when the one before exits
+        outcomes, stuck = self._simulate(entries)
+
+        self.trades = []
+        self.results = []
+        # bar positions of each trade, turned in to timestamps all at once at the end
+        self._trade_positions = []
+        position = self._start
+        while True:
+            next_entry = np.searchsorted(entries, position)
+            if next_entry == len(entries):
+                break
+
+            outcome = outcomes[next_entry]
+            if outcome is None:
+                # still open when the bars ran out, so never terminated
+                if next_entry in stuck:
+                    log.warning(
+                        f"{self.symbol}: {config.name} instance from "
+                        f"{self.signals.index[entries[next_entry]]} stopped selling anything - "
+                        f"treating it as never terminating"
+                    )
+                break
+
+            exit_position = self._terminate(entries[next_entry], *outcome)
+            # the replacement instance first runs on the next bar
+            position = exit_position + 1
+
+        if self._trade_positions:
+            index = self.signals.index
+            signals, bought, exited = np.array(self._trade_positions).T
+            for signal_at, bought_at, exited_at, was_bought in zip(
+                index[signals], index[np.maximum(bought, 0)], index[exited], bought >= 0
+            ):
+                self.trades.append(
+                    {
+                        "signal": signal_at,
+                        "bought": bought_at if was_bought else None,
+                        "exited": exited_at,
+                    }
+                )
+
+        return self.results
+
+    def _simulate(self, signals: np.ndarray) -> tuple[list[tuple], set[int]]:
+        # (bought, exited, units, buy_value, sells) for each signal, or None if it never
+        # terminates, and which of the signals never terminate because their ladder got stuck
+        config = self.play_config
+        symbol = self.symbol
+        simulator = self.signals.exit_simulator(symbol)
+        closes = self._close[signals]
+
+        stops = [
+            symbol.align_price(u) for u in self.signals.cycles.stop_loss_units(signals)
+        ]
+        units = []
+        for close in closes:
+            these_units = config.max_play_size / close
+            if not symbol.notional_units:
+                these_units = floor(these_units)
+            units.append(symbol.align_quantity(these_units))
+
+        outcomes = [None] * len(signals)
+        if config.buy_order_type == "limit":
+            limits = simulator.aligned_close(signals)
+            timeout = config.buy_timeout_intervals
+            # a timeout of 0 or less never counts down to 0, so the order just waits
+            if timeout <= 0:
+                last_chance = np.full(len(signals), self._end)
+            else:
+                last_chance = np.minimum(signals + timeout, self._end)
+            bought = simulator.first_low_at_or_below(signals, limits, last_chance)
+
+            for n in np.flatnonzero(bought < 0):
+                # timed out, unless the bars ran out first
+                if timeout > 0 and last_chance[n] == signals[n] + timeout:
+                    outcomes[n] = (None, last_chance[n] - 1, 0, 0, [])
+            entry_prices = limits
+        else:
+            bought = signals.copy()
+            entry_prices = closes
+
+        held = np.flatnonzero(bought >= 0)
+        exits = simulator.take_profit_ladder(
+            entries=bought[held],
+            entry_prices=entry_prices[held],
+            stops=[stops[n] for n in held],
+            units=[units[n] for n in held],
+            risk_multiplier=config.take_profit_risk_multiplier,
+            pct_to_sell=config.take_profit_pct_to_sell,
+            symbol=symbol,
+            end=self._end,
+        )
+        stuck = set()
+        for i, n in enumerate(held):
+            if exits.stuck[i]:
+                stuck.add(n)
+            if exits.exited[i] >= 0:
+                entry = float(entry_prices[n])
+                outcomes[n] = (
+                    bought[n],
+                    exits.exited[i],
+                    units[n],
+                    entry * units[n],
+                    exits.sells[i],
+                )
+
+        return outcomes, stuck
+
+    def _terminate(
+        self,
+        signal: int,
+        bought: int,
+        exited: int,
+        units: float,
+        buy_value: float,
+        sells: list[tuple[float, float, bool]],
+    ) -> int:
+        config = self.play_config
+
+        # same running sum the OrderLedger keeps
+        sell_value = 0
+        for _, value, _ in sells:
+            if value:
+                sell_value += value
+
+        self.results.append(
+            {
+                "run_id": self.run_id,
+                "weather_condition": config.market_condition,
+                "symbol": str(self.symbol),
+                "symbol_group": config.symbol_category,
+                "play_config_name": config.name,
+                "units": units,
+                "bought_value": buy_value,
+                "sold_value": sell_value,
+                "total_gain": sell_value - buy_value,
+                "average_buy_price": 0 if buy_value == 0 else buy_value / units,
+                "average_sell_price": 0 if sell_value == 0 else sell_value / units,
+                "buy_order_count": 1,
+                "sell_order_count": len(sells),
+                "sell_order_filled_count": sum(1 for s in sells if s[2]),
+                "instance_id": f"{self.symbol.yf_symbol}-{config.name}-instance-"
+                f"{uuid.uuid4().hex[:6].upper()}",
+            }
+        )
+
+        self._trade_positions.append((signal, -1 if bought is None else bought, exited))
+        return exited
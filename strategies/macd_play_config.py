@@ -15,3 +15,13 @@ class MacdPlayConfig(PlayConfig):
         self.buy_signal_strength = buy_signal_strength
         self.check_sma = check_sma
         self.sma_comparison_period = sma_comparison_period
+
+    @property
+    def entry_signal_key(self):
+        # MacdStateWaiting only looks at these - the rest of the config is about exiting
+        return (
+            self.state_waiting,
+            self.sma_comparison_period,
+            self.check_sma,
+            self.buy_signal_strength,
+        )
@@ -0,0 +1,226 @@
+from symbol import Symbol
+import numpy as np
+import pandas as pd
+
+from core.exit_simulator import ExitSimulator
+
+import logging
+
+log = logging.getLogger(__name__)
+
+
+class MacdCycleIndex:
+    """
+    Red/blue MACD cycles over a symbol's whole history. A cycle starts on every macd_crossover row
+    and runs until the row before the next crossover. Blue means MA12 is above MA26.
+
+    Holds the start/end position of each cycle and the lowest Close (and where it happened) within
+    each cycle, so that the stop loss for a new entry can be found from a couple of binary searches
+    and a few per-cycle values rather than boolean-mask scans over the whole history
+    """
+
+    starts: np.ndarray
+    ends: np.ndarray
+    blue: np.ndarray
+    cycle_min: np.ndarray
+    cycle_argmin: np.ndarray
+    blue_starts: np.ndarray
+    entry_starts: np.ndarray
+
+    def __init__(
+        self,
+        close: np.ndarray,
+        macd: np.ndarray,
+        above_signal: np.ndarray,
+        crossover: np.ndarray,
+    ) -> None:
+        self.close = close
+        self.starts = np.flatnonzero(crossover)
+        self.ends = np.append(self.starts[1:] - 1, len(close) - 1)
+        self.blue = above_signal[self.starts]
+
+        self.cycle_min = np.minimum.reduceat(close, self.starts)
+        # first position in each cycle that hits the cycle's minimum, same as idxmin
+        lengths = self.ends - self.starts + 1
+        hits = np.flatnonzero(close == np.repeat(self.cycle_min, lengths))
+        self.cycle_argmin = hits[np.searchsorted(hits, self.starts)]
+
+        self.blue_starts = self.starts[self.blue]
+        # cycles that turned blue while MACD was still negative - these are what trigger an entry
+        self.entry_starts = self.starts[macd[self.starts] < 0]
+
+    def stop_loss(self, position: int) -> tuple[float, int, int, int]:
+        """
+        Stop loss for an entry at position: the lowest Close from the start of the previous blue
+        cycle up to and including the start of the blue cycle that triggered the entry.
+        Returns (stop unit price, stop position, previous blue cycle start, entry cycle start)
+        """
+        entry = np.searchsorted(self.entry_starts, position, side="right") - 1
+        if entry < 0:
+            raise IndexError(f"No entry cycle found at or before position {position}")
+        entry_start = self.entry_starts[entry]
+        entry_cycle = np.searchsorted(self.starts, entry_start)
+
+        previous = np.searchsorted(self.blue_starts, entry_start, side="left") - 1
+        if previous < 0:
+            raise IndexError(
+                f"No blue cycle found before the cycle starting at position {entry_start}"
+            )
+        previous_start = self.blue_starts[previous]
+        previous_cycle = np.searchsorted(self.starts, previous_start)
+
+        # whole cycles between the two starts, then the first bar of the entry cycle itself
+        cycle_mins = self.cycle_min[previous_cycle:entry_cycle]
+        lowest = np.argmin(cycle_mins)
+        stop_unit = cycle_mins[lowest]
+        stop_position = self.cycle_argmin[previous_cycle + lowest]
+        if self.close[entry_start] < stop_unit:
+            stop_unit = self.close[entry_start]
+            stop_position = entry_start
+
+        return stop_unit, stop_position, previous_start, entry_start
+
+    def stop_loss_units(self, positions: np.ndarray) -> np.ndarray:
+        # stop loss unit prices for many entries at once - the same as stop_loss()[0] for each
+        positions = np.asarray(positions, dtype=np.int64)
+        if len(positions) == 0:
+            return np.empty(0)
+
+        entry = np.searchsorted(self.entry_starts, positions, side="right") - 1
+        if (entry < 0).any():
+            raise IndexError(
+                f"No entry cycle found at or before position {positions[entry < 0][0]}"
+            )
+        entry_starts = self.entry_starts[entry]
+        entry_cycles = np.searchsorted(self.starts, entry_starts)
+
+        previous = np.searchsorted(self.blue_starts, entry_starts, side="left") - 1
+        if (previous < 0).any():
+            raise IndexError(
+                f"No blue cycle found before the cycle starting at position "
+                f"{entry_starts[previous < 0][0]}"
+            )
+        previous_cycles = np.searchsorted(self.starts, self.blue_starts[previous])
+
+        # reduceat over alternating (previous cycle, entry cycle) bounds gives the min over each
+        # pair's cycles at the even positions. the inf on the end covers an entry cycle that's
+        # the last one
+        bounds = np.empty(2 * len(positions), dtype=np.int64)
+        bounds[0::2] = previous_cycles
+        bounds[1::2] = entry_cycles
+        lowest = np.minimum.reduceat(np.append(self.cycle_min, np.inf), bounds)[0::2]
+
+        return np.minimum(lowest, self.close[entry_starts])
+
+
+class MacdSignals:
+    """
+    Whole-history MACD/SMA columns for one symbol, held as numpy arrays so that the waiting state
+    can look up whether there's a buy signal at time_manager.now instead of slicing the OHLC
+    DataFrame on every tick. Built from bars that have already had MacdTA and SMA applied.
+
+    Entry signals only ever look at the row for now and rows before it, so computing them over the
+    whole back test window up front doesn't leak future data in to the decision
+    """
+
+    index: pd.DatetimeIndex
+    close: np.ndarray
+    macd: np.ndarray
+    macd_signal: np.ndarray
+    crossover: np.ndarray
+    sma: np.ndarray
+    cycles: MacdCycleIndex
+    _entry_signals: dict[tuple, np.ndarray]
+    _exit_simulator: ExitSimulator
+    _built_from: tuple
+
+    def __init__(self, bars: pd.DataFrame, built_from: tuple = None) -> None:
+        self._built_from = built_from
+        self.index = bars.index
+        self.close = bars.Close.to_numpy(dtype=np.float64)
+        self.macd = bars.macd_macd.to_numpy(dtype=np.float64)
+        self.macd_signal = bars.macd_signal.to_numpy(dtype=np.float64)
+        self.crossover = bars.macd_crossover.to_numpy(dtype=bool)
+        self.sma = bars.sma.to_numpy(dtype=np.float64)
+        self._entry_signals = dict()
+        self._exit_simulator = None
+        self.cycles = MacdCycleIndex(
+            close=self.close,
+            macd=self.macd,
+            above_signal=bars.macd_above_signal.to_numpy(dtype=bool),
+            crossover=self.crossover,
+        )
+
+    @staticmethod
+    def _fingerprint(bars: pd.DataFrame, cache: dict) -> tuple:
+        # in paper/live runs new bars get appended, so the length and last bar (as nanoseconds -
+        # pulling a Timestamp out of the index costs more than the rest put together). TA being
+        # run again changes the columns without either of those changing, but SymbolData's caches
+        # count every change it makes to the bars
+        index = bars.index
+        return (
+            len(index),
+            int(index.asi8[-1]) if len(index) else None,
+            getattr(cache, "bars_version", None),
+        )
+
+    @classmethod
+    def for_symbol(cls, symbol: Symbol, cache: dict = None) -> "MacdSignals":
+        """
+        Signals for the symbol's current bars. cache is where they're kept between calls, normally
+        the symbol's SymbolData.signal_caches entry that states get as signal_cache. Only the
+        latest signals for the symbol are kept, and they're rebuilt when the bars change
+        """
+        bars = symbol.ohlc.bars
+        cached = None if cache is None else cache.get(cls.__name__)
+        built_from = cls._fingerprint(bars, cache)
+
+        # different bars never match, even under the same symbol name
+        if cached is None or cached[0] is not bars or cached[1]._built_from != built_from:
+            log.log(9, "%s: Building MACD signal arrays", symbol.yf_symbol)
+            signals = cls(bars, built_from)
+            if cache is not None:
+                cache[cls.__name__] = (bars, signals)
+            return signals
+
+        return cached[1]
+
+    def position(self, now: pd.Timestamp) -> int:
+        # position of the latest bar at or before now ie. the last row get_range() would return
+        try:
+            return self.index.get_loc(now)
+        except KeyError:
+            return self.index.searchsorted(now, side="right") - 1
+
+    def recent_sma(self, sma_comparison_period: int) -> np.ndarray:
+        # sma as it was sma_comparison_period rows back, counting the current row as the first
+        # ie. the vectorised equivalent of df.sma.iloc[-sma_comparison_period]
+        shifted = np.full(len(self.sma), np.nan)
+        offset = sma_comparison_period - 1
+        shifted[offset:] = self.sma[: len(self.sma) - offset]
+        return shifted
+
+    def entry_signal(self, sma_comparison_period: int, check_sma: bool) -> np.ndarray:
+        key = (sma_comparison_period, check_sma)
+        if key not in self._entry_signals:
+            # crossover of MA12 over MA26 while MACD is still negative
+            signal = self.crossover & (self.macd < 0)
+            if check_sma:
+                # and SMA is higher than it was sma_comparison_period ago. NaN compares False
+                signal &= self.sma > self.recent_sma(sma_comparison_period)
+            self._entry_signals[key] = signal
+
+        return self._entry_signals[key]
+
+    def exit_simulator(self, symbol: Symbol) -> ExitSimulator:
+        # only built the first time a fast back test asks for it
+        if self._exit_simulator is None:
+            bars = symbol.ohlc.bars
+            self._exit_simulator = ExitSimulator(
+                high=bars.High.to_numpy(dtype=np.float64),
+                low=bars.Low.to_numpy(dtype=np.float64),
+                close=self.close,
+                align_price=symbol.align_price,
+            )
+
+        return self._exit_simulator
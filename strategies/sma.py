@@ -1,11 +1,15 @@
-from core import ITA
+from core import ITA, ITAStream, SmaStream
 import pandas as pd
+import numpy as np
 import btalib
 
 
 class SMA(ITA):
     __tabot_strategy__: bool = True
 
+    inputs = ("Close",)
+    outputs = ("sma",)
+
     class SMAColumns:
         df: pd.DataFrame
 
@@ -15,3 +19,17 @@ class SMA(ITA):
     def do_ta(ohlc_data: pd.DataFrame):
         btadf = btalib.sma(ohlc_data).df
         return SMA.SMAColumns(btadf)
+
+    class SMAStream(ITAStream):
+        def __init__(self) -> None:
+            # btalib.sma default period
+            self._sma = SmaStream(30)
+
+        def update(self, new_bar: pd.Series) -> dict:
+            return {"sma": self._sma.update(new_bar["Close"])}
+
+    def stream(ohlc_data: pd.DataFrame) -> SMAStream:
+        stream = SMA.SMAStream()
+        for close in ohlc_data.Close.to_numpy(dtype=np.float64):
+            stream.update({"Close": close})
+        return stream